@@ -0,0 +1,443 @@
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import argparse
+import itertools
+import platform
+import resource
+import tempfile
+import subprocess
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+# ==========================================
+# BENCHMARK SOCIAL RADAR (DATA SINTETIS)
+# ==========================================
+# Data asli cuma ~64 KB survey & ~1k elemen OSM, jadi perilaku di skala produksi tidak kelihatan.
+# Script ini:
+#   1. membuat survey sintetis berformat persis hasil_survey.csv (termasuk quoting ganda Google Forms)
+#      dan Overpass JSON sintetis, dengan kosakata diambil dari file asli;
+#   2. menjalankan tiap tahap di proses terpisah (supaya peak RSS per tahap bersih) di workdir sementara,
+#      jadi datalake & DB milik repo tidak tersentuh;
+#   3. menulis hasil sebagai JSON lines (satu baris per skenario) yang bisa dibandingkan antar commit.
+#
+# Contoh:
+#   python benchmark.py --survey 10000 100000 --osm 1000 100000 --chunksize 50000
+#   python benchmark.py --survey 100000 --chunksize 50000 --workers 1 4
+#   python benchmark.py --bandingkan hasil_lama.jsonl bench_results.jsonl
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+KODE = ['elt_pipeline.py', 'engine.py', 'db_pool.py', 'geo_index.py', 'weather.py', 'metrics.py', 'result_cache.py', 'kota.py', 'kota.json']
+SURVEY_ASLI = os.path.join(BASE_DIR, 'hasil_survey.csv')
+OSM_ASLI = os.path.join(BASE_DIR, 'lokasi_bjm.json')
+HASIL_DEFAULT = os.path.join(BASE_DIR, 'bench_results.jsonl')
+PENANDA = 'BENCH_HASIL '
+
+
+# ==========================================
+# 1. GENERATOR SURVEY (FORMAT hasil_survey.csv)
+# ==========================================
+def _field_survey(nilai):
+    # Sel CSV biasa (di-quote kalau berisi koma/quote)
+    if nilai is None:
+        return ''
+    if any(c in nilai for c in ',"\n'):
+        return '"' + nilai.replace('"', '""') + '"'
+    return nilai
+
+def _baris_survey(isi):
+    # Quirk export Forms: baris yang mengandung quote dibungkus "..." dan quote di dalamnya digandakan,
+    # baris tanpa quote ditulis apa adanya
+    if '"' in isi:
+        return '"' + isi.replace('"', '""') + '"\n'
+    return isi + '\n'
+
+def _vocab_survey(path=SURVEY_ASLI):
+    # Per gender: daftar nilai teramati per kolom (sel kosong = ''), sudah dalam bentuk sel CSV
+    sys.path.insert(0, BASE_DIR)
+    from elt_pipeline import clean_csv_quotes
+    with clean_csv_quotes(path) as reader:
+        header = reader.readline().strip()
+        df = pd.read_csv(reader, header=None, names=header.split(','), dtype=str)
+    kolom = [k for k in df.columns if k not in ('timestamp', 'gender')]
+    vocab = {}
+    for gender, d in df.groupby('gender'):
+        vocab[gender] = {k: [_field_survey(None if pd.isna(v) else v) for v in d[k]] for k in kolom}
+    return header, kolom, vocab
+
+def gen_survey(path, n_baris, seed=0, hari=30, mulai=datetime(2025, 12, 15, 7, 0, 0), batch=50_000):
+    """Tulis `n_baris` respon survey sintetis ke `path` (streaming, memori konstan). Return ukuran byte."""
+    header, kolom, vocab = _vocab_survey()
+    rng = np.random.default_rng(seed)
+    genders = sorted(vocab)
+    # Sel tiap kolom diambil acak dari nilai asli gender yang sama, jadi pola kolom kosong tetap realistis
+    pool = {g: [np.array(vocab[g][k], dtype=object) for k in kolom] for g in genders}
+    detik_total = hari * 24 * 3600
+
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        f.write(header + '\n')
+        for awal in range(0, n_baris, batch):
+            n = min(batch, n_baris - awal)
+            # Timestamp naik (seperti export Forms) + jitter kecil
+            idx = np.arange(awal, awal + n)
+            detik = (idx * (detik_total / max(n_baris, 1)) + rng.uniform(0, 60, n)).astype(np.int64)
+            ts = pd.Timestamp(mulai) + pd.to_timedelta(detik, unit='s')
+            ts_str = (ts.month.astype(str) + '/' + ts.day.astype(str) + '/' + ts.year.astype(str) + ' '
+                      + ts.strftime('%H:%M:%S'))
+
+            g_idx = rng.integers(0, len(genders), n)
+            kolom_sel = np.empty((len(kolom), n), dtype=object)
+            for gi, g in enumerate(genders):
+                mask = g_idx == gi
+                m = int(mask.sum())
+                if not m:
+                    continue
+                for ki, nilai in enumerate(pool[g]):
+                    kolom_sel[ki, mask] = nilai[rng.integers(0, len(nilai), m)]
+            gender_arr = np.array(genders, dtype=object)[g_idx]
+
+            baris = [_baris_survey(t + ',' + g + ',' + ','.join(sel))
+                     for t, g, sel in zip(ts_str, gender_arr, kolom_sel.T)]
+            f.writelines(baris)
+    return os.path.getsize(path)
+
+
+# ==========================================
+# 2. GENERATOR OVERPASS JSON
+# ==========================================
+def gen_overpass(path, n_elemen, seed=0, sebaran_km=15.0):
+    """Tulis `n_elemen` elemen Overpass sintetis (node & way+center, tag dari lokasi_bjm.json). Return ukuran byte."""
+    with open(OSM_ASLI, encoding='utf-8') as f:
+        asli = json.load(f)
+    template = asli['elements']
+    rng = random.Random(seed)
+    lat0, lon0 = -3.3194, 114.5928
+    derajat = sebaran_km / 111.32
+
+    with open(path, 'w', encoding='utf-8') as f:
+        kepala = {k: v for k, v in asli.items() if k != 'elements'}
+        f.write(json.dumps(kepala, ensure_ascii=False)[:-1] + ',\n"elements": [\n')
+        for i in range(n_elemen):
+            tpl = template[i % len(template)]
+            el = {'type': tpl['type'], 'id': 10_000_000_000 + i}
+            lat = lat0 + rng.uniform(-derajat, derajat)
+            lon = lon0 + rng.uniform(-derajat, derajat)
+            if 'center' in tpl:
+                el['center'] = {'lat': round(lat, 7), 'lon': round(lon, 7)}
+                el['nodes'] = tpl.get('nodes', [])
+            else:
+                el['lat'], el['lon'] = round(lat, 7), round(lon, 7)
+            tags = dict(tpl.get('tags', {}))
+            # Putaran pertama pakai nama asli (habitat tetap bisa match), sisanya diberi nomor cabang
+            if 'name' in tags and i >= len(template):
+                tags['name'] = f"{tags['name']} {i // len(template)}"
+            if tags:
+                el['tags'] = tags
+            f.write(('' if i == 0 else ',\n') + json.dumps(el, ensure_ascii=False))
+        f.write('\n]\n}\n')
+    return os.path.getsize(path)
+
+
+# ==========================================
+# 3. PENGUKURAN (DIJALANKAN DI PROSES ANAK)
+# ==========================================
+def _rss_mb():
+    # ru_maxrss di Linux dalam KB
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def _ukur_elt(workdir, chunksize, workers=1):
+    import elt_pipeline
+    mulai = time.perf_counter()
+    elt_pipeline.run_elt(full_refresh=True, chunksize=chunksize, workers=workers, kota=elt_pipeline.KOTA_DEFAULT)
+    detik = time.perf_counter() - mulai
+
+    import pyarrow.parquet as pq
+    files = [os.path.join(r, f) for r, _, fs in os.walk(elt_pipeline.GOLD_LOCATIONS) for f in fs if f.endswith('.parquet')]
+    n_gold = sum(pq.ParquetFile(p).metadata.num_rows for p in files)
+    n_osm = pq.ParquetFile(elt_pipeline.OSM_SILVER).metadata.num_rows if os.path.exists(elt_pipeline.OSM_SILVER) else 0
+    survey_bytes = os.path.getsize(os.path.join(workdir, 'hasil_survey.csv'))
+    survey_baris = sum(1 for _ in open(os.path.join(workdir, 'hasil_survey.csv'), 'rb')) - 1
+    return {
+        'detik': detik, 'peak_rss_mb': _rss_mb(), 'workers': workers,
+        # Peak RSS worker terbesar (process pool), 0 kalau serial
+        'peak_rss_worker_mb': resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024,
+        'survey_baris': survey_baris, 'gold_baris': n_gold, 'gold_file': len(files), 'osm_tempat': n_osm,
+        'baris_per_s': survey_baris / detik, 'mb_per_s': survey_bytes / 1e6 / detik,
+    }
+
+def _archetype_per_baris(text, tabel, default):
+    # Cara lama (get_archetype sebelum dikompilasi): lower + any(k in text) per baris, archetype berurutan
+    text = str(text).lower()
+    for archetype, keywords in tabel:
+        if any(k in text for k in keywords):
+            return archetype
+    return default
+
+def _ukur_klasifikasi(workdir):
+    import elt_pipeline
+    # Kolom ciri fisik seluruh gold hasil tahap ELT
+    teks = pd.read_parquet(elt_pipeline.GOLD_LOCATIONS, columns=['ciri_fisik'])['ciri_fisik']
+    tabel, default = elt_pipeline.KEYWORD_ARCHETYPE, elt_pipeline.ARCHETYPE_DEFAULT
+
+    mulai = time.perf_counter()
+    lama = [_archetype_per_baris(t, tabel, default) for t in teks]
+    detik_lama = time.perf_counter() - mulai
+
+    mulai = time.perf_counter()
+    baru = elt_pipeline.klasifikasi_archetype(teks)
+    detik_baru = time.perf_counter() - mulai
+
+    return {
+        'baris': len(teks), 'unik': int(teks.nunique()), 'sama': bool((baru.to_numpy() == np.array(lama, dtype=object)).all()),
+        'per_baris_s': detik_lama, 'vektor_s': detik_baru,
+        'per_baris_baris_per_s': len(teks) / detik_lama, 'vektor_baris_per_s': len(teks) / detik_baru,
+    }
+
+def _ukur_init_db(workdir):
+    import engine
+    if os.path.exists(engine.DB_FILE):
+        os.remove(engine.DB_FILE)
+    mulai = time.perf_counter()
+    engine.init_db(engine.DB_FILE)
+    detik = time.perf_counter() - mulai
+
+    # Startup hangat: sumber tidak berubah -> cek fingerprint + buka DB + opsi dropdown saja
+    mulai = time.perf_counter()
+    engine.sinkron_db(engine.DB_FILE)
+    eng = engine.RadarEngine()
+    eng.opsi_traits()
+    detik_hangat = time.perf_counter() - mulai
+    eng.close()
+    return {'detik': detik, 'hangat_s': detik_hangat, 'peak_rss_mb': _rss_mb(), 'db_mb': os.path.getsize(engine.path_aktif(engine.DB_FILE)) / 1e6}
+
+def _ukur_cari_target(workdir, n_query, seed):
+    import engine
+    mulai = time.perf_counter()
+    eng = engine.RadarEngine()
+    opsi = eng.opsi_traits()
+    eng.hitung_skor(opsi[:1]); eng.gps_index(); eng.time_lookup()
+    detik_muat = time.perf_counter() - mulai
+
+    rng = random.Random(seed)
+    senin = eng.tz.localize(datetime(2025, 12, 15))
+    daftar_ciri = [rng.sample(opsi, rng.randint(1, min(4, len(opsi)))) for _ in range(n_query)]
+    daftar_waktu = [senin + timedelta(minutes=rng.randrange(7 * 24 * 60)) for _ in range(n_query)]
+
+    # Latency per request (jalur UI: context waktu + cari_target)
+    lat_ms = []
+    for ciri, waktu in zip(daftar_ciri, daftar_waktu):
+        t0 = time.perf_counter()
+        eng.cari_target(ciri, context_waktu=eng.get_time_context(waktu), rng=rng)
+        lat_ms.append((time.perf_counter() - t0) * 1000)
+
+    # Jalur UI dengan cache hasil (tanpa rng): putaran pertama mengisi cache, putaran kedua diukur
+    daftar_ctx = [eng.get_time_context(waktu) for waktu in daftar_waktu]
+    for ciri, ctx in zip(daftar_ciri, daftar_ctx):
+        eng.cari_target(ciri, context_waktu=ctx)
+    lat_cache_ms = []
+    for ciri, ctx in zip(daftar_ciri, daftar_ctx):
+        t0 = time.perf_counter()
+        eng.cari_target(ciri, context_waktu=ctx)
+        lat_cache_ms.append((time.perf_counter() - t0) * 1000)
+    cache = eng.cache.stats()
+
+    # Throughput jalur batch
+    t0 = time.perf_counter()
+    eng.cari_target_batch(daftar_ciri, daftar_waktu, rng=random.Random(seed))
+    detik_batch = time.perf_counter() - t0
+    eng.close()
+
+    lat = np.array(lat_ms)
+    return {
+        'query': n_query, 'muat_index_s': detik_muat,
+        'p50_ms': float(np.percentile(lat, 50)), 'p99_ms': float(np.percentile(lat, 99)),
+        'mean_ms': float(lat.mean()), 'max_ms': float(lat.max()),
+        'p50_cache_ms': float(np.percentile(lat_cache_ms, 50)), 'cache_hit_rate': cache['hit_rate'],
+        'batch_req_per_s': n_query / detik_batch, 'peak_rss_mb': _rss_mb(),
+    }
+
+def _jalankan_anak(args):
+    os.chdir(args.workdir)
+    sys.path.insert(0, args.workdir)
+    if args.ukur == 'elt':
+        hasil = _ukur_elt(args.workdir, args.chunksize, args.workers[0])
+    elif args.ukur == 'klasifikasi':
+        hasil = _ukur_klasifikasi(args.workdir)
+    elif args.ukur == 'init_db':
+        hasil = _ukur_init_db(args.workdir)
+    else:
+        hasil = _ukur_cari_target(args.workdir, args.query, args.seed)
+    _kirim_hasil(hasil)
+
+def _kirim_hasil(hasil):
+    # Dibaca _jalankan_proses di proses induk (stdout anak bisa berisi log lain)
+    print(PENANDA + json.dumps(hasil), flush=True)
+
+
+# ==========================================
+# 4. ORKESTRASI
+# ==========================================
+def siapkan_workdir(workdir, survey_path, osm_path):
+    # Salinan kode + data sintetis; path di modul relatif ke file-nya, jadi datalake ikut pindah.
+    # Yang diukur hanya kota default (shard kota lain tidak dibuka)
+    sys.path.insert(0, BASE_DIR)
+    from kota import KOTA_DEFAULT
+    silver = os.path.join(workdir, os.path.relpath(KOTA_DEFAULT.silver, BASE_DIR))
+    os.makedirs(silver, exist_ok=True)
+    for nama in KODE:
+        shutil.copy2(os.path.join(BASE_DIR, nama), workdir)
+    for path in (KOTA_DEFAULT.raw['rules'], os.path.join(BASE_DIR, 'archetype_keywords.csv')):
+        shutil.copy2(path, workdir)
+    # Rules silver ikut disalin: kalau CSV rules gagal di-parse, ELT memakai parquet yang sudah ada
+    if os.path.exists(KOTA_DEFAULT.rules_silver):
+        shutil.copy2(KOTA_DEFAULT.rules_silver, silver)
+    for src, path in ((survey_path, KOTA_DEFAULT.raw['survey']), (osm_path, KOTA_DEFAULT.raw['osm'])):
+        nama = os.path.basename(path)
+        tujuan = os.path.join(workdir, nama)
+        if os.path.exists(tujuan):
+            os.remove(tujuan)
+        try:
+            os.link(src, tujuan)
+        except OSError:
+            shutil.copy2(src, tujuan)
+
+def ukur(tahap, workdir, chunksize=None, query=0, seed=0, verbose=False, workers=1):
+    cmd = [sys.executable, os.path.abspath(__file__), '--ukur', tahap, '--workdir', workdir,
+           '--query', str(query), '--seed', str(seed), '--workers', str(workers)]
+    if chunksize:
+        cmd += ['--chunksize', str(chunksize)]
+    return _jalankan_proses(cmd, f"Tahap {tahap}", verbose)
+
+def _jalankan_proses(cmd, label, verbose=False):
+    """Jalankan satu pengukuran di proses anak; return dict yang dikirim anak lewat _kirim_hasil."""
+    proc = subprocess.run(cmd, capture_output=True, text=True)
+    if verbose:
+        print(proc.stdout, end='')
+    for line in proc.stdout.splitlines():
+        if line.startswith(PENANDA):
+            return json.loads(line[len(PENANDA):])
+    raise RuntimeError(f"{label} gagal:\n{proc.stdout[-2000:]}\n{proc.stderr[-2000:]}")
+
+def _commit():
+    try:
+        out = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=BASE_DIR, capture_output=True, text=True)
+        return out.stdout.strip() or None
+    except OSError:
+        return None
+
+def data_sintetis(data_dir, n_survey, n_osm, seed):
+    # Data yang sama dipakai ulang antar run/commit (nama file = ukuran + seed)
+    os.makedirs(data_dir, exist_ok=True)
+    survey = os.path.join(data_dir, f'survey_{n_survey}_s{seed}.csv')
+    osm = os.path.join(data_dir, f'overpass_{n_osm}_s{seed}.json')
+    if not os.path.exists(survey):
+        t0 = time.perf_counter()
+        ukuran = gen_survey(survey + '.tmp', n_survey, seed=seed)
+        os.replace(survey + '.tmp', survey)
+        print(f"🧪 Survey sintetis {n_survey} baris ({ukuran / 1e6:.1f} MB) dalam {time.perf_counter() - t0:.1f} s")
+    if not os.path.exists(osm):
+        t0 = time.perf_counter()
+        ukuran = gen_overpass(osm + '.tmp', n_osm, seed=seed)
+        os.replace(osm + '.tmp', osm)
+        print(f"🧪 Overpass sintetis {n_osm} elemen ({ukuran / 1e6:.1f} MB) dalam {time.perf_counter() - t0:.1f} s")
+    return survey, osm
+
+def run_benchmark(survey_sizes, osm_sizes, query=1000, chunksize=None, seed=0, data_dir=None,
+                  output=HASIL_DEFAULT, verbose=False, daftar_workers=(1,)):
+    data_dir = data_dir or os.path.join(tempfile.gettempdir(), 'social_radar_bench')
+    commit = _commit()
+    mesin = {'python': platform.python_version(), 'platform': platform.platform(), 'cpu': os.cpu_count()}
+    semua = []
+    for n_survey in survey_sizes:
+        for n_osm, workers in itertools.product(osm_sizes, daftar_workers):
+            survey, osm = data_sintetis(data_dir, n_survey, n_osm, seed)
+            workdir = tempfile.mkdtemp(prefix='radar_bench_')
+            try:
+                siapkan_workdir(workdir, survey, osm)
+                print(f"⏱️ Skenario survey={n_survey} osm={n_osm} workers={workers} ...")
+                hasil = {
+                    'commit': commit, 'waktu': datetime.now().isoformat(timespec='seconds'), 'mesin': mesin,
+                    'skenario': {'survey_baris': n_survey, 'osm_elemen': n_osm, 'chunksize': chunksize,
+                                 'workers': workers, 'query': query, 'seed': seed},
+                }
+                hasil['elt'] = ukur('elt', workdir, chunksize=chunksize, verbose=verbose, workers=workers)
+                hasil['klasifikasi'] = ukur('klasifikasi', workdir, verbose=verbose)
+                hasil['init_db'] = ukur('init_db', workdir, verbose=verbose)
+                hasil['cari_target'] = ukur('cari_target', workdir, query=query, seed=seed, verbose=verbose)
+            finally:
+                shutil.rmtree(workdir, ignore_errors=True)
+
+            e, k, d, c = hasil['elt'], hasil['klasifikasi'], hasil['init_db'], hasil['cari_target']
+            print(f"   ELT      : {e['detik']:.2f} s, {e['baris_per_s']:,.0f} baris/s, {e['mb_per_s']:.1f} MB/s, peak {e['peak_rss_mb']:.0f} MB")
+            print(f"   archetype: {k['vektor_baris_per_s']:,.0f} baris/s (per baris {k['per_baris_baris_per_s']:,.0f} baris/s), "
+                  f"{k['baris']:,} baris / {k['unik']:,} unik, hasil {'sama' if k['sama'] else 'BEDA'}")
+            print(f"   init_db  : {d['detik']:.2f} s (startup hangat {d['hangat_s']:.3f} s), peak {d['peak_rss_mb']:.0f} MB")
+            print(f"   cari_target: p50 {c['p50_ms']:.2f} ms, p99 {c['p99_ms']:.2f} ms, batch {c['batch_req_per_s']:,.0f} req/s, "
+                  f"p50 cache hit {c['p50_cache_ms']:.3f} ms")
+            with open(output, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(hasil) + '\n')
+            semua.append(hasil)
+    print(f"🏁 {len(semua)} skenario tersimpan di: {output}")
+    return semua
+
+
+# ==========================================
+# 5. PERBANDINGAN ANTAR COMMIT
+# ==========================================
+METRIK = [('elt', 'detik'), ('elt', 'peak_rss_mb'), ('klasifikasi', 'per_baris_s'), ('klasifikasi', 'vektor_s'), ('init_db', 'detik'), ('init_db', 'hangat_s'), ('init_db', 'peak_rss_mb'),
+          ('cari_target', 'p50_ms'), ('cari_target', 'p99_ms'), ('cari_target', 'p50_cache_ms'), ('cari_target', 'batch_req_per_s')]
+
+def _kunci_skenario(s):
+    return (s['survey_baris'], s['osm_elemen'], s['chunksize'], s['query'], s.get('workers', 1))
+
+def _baca_hasil(path, kunci=_kunci_skenario):
+    # Hasil terakhir per skenario (`kunci` = fungsi dict skenario -> key)
+    hasil = {}
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                r = json.loads(line)
+                hasil[kunci(r['skenario'])] = r
+    return hasil
+
+def bandingkan(path_lama, path_baru):
+    lama, baru = _baca_hasil(path_lama), _baca_hasil(path_baru)
+    for key in sorted(set(lama) & set(baru), key=lambda k: tuple(x or 0 for x in k)):
+        a, b = lama[key], baru[key]
+        print(f"📊 survey={key[0]} osm={key[1]} chunksize={key[2]} query={key[3]} workers={key[4]}  ({a['commit']} -> {b['commit']})")
+        for tahap, metrik in METRIK:
+            va, vb = a.get(tahap, {}).get(metrik), b.get(tahap, {}).get(metrik)
+            if va is None or vb is None:
+                continue
+            rasio = vb / va if va else float('nan')
+            print(f"   {tahap + '.' + metrik:<28} {va:>12.2f} -> {vb:>12.2f}  (x{rasio:.2f})")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark Social Radar dengan data sintetis")
+    parser.add_argument('--survey', type=int, nargs='+', default=[10_000], help="jumlah baris survey (10k - 10M)")
+    parser.add_argument('--osm', type=int, nargs='+', default=[1_000], help="jumlah elemen Overpass (1k - 1M)")
+    parser.add_argument('--query', type=int, default=200, help="jumlah request cari_target untuk latency")
+    parser.add_argument('--chunksize', type=int, default=None, help="diteruskan ke run_elt (wajib untuk survey besar)")
+    parser.add_argument('--workers', type=int, nargs='+', default=[1], help="worker ELT paralel, 0 = semua core (satu skenario per nilai)")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--data-dir', default=None, help="folder cache data sintetis (default: temp)")
+    parser.add_argument('-o', '--output', default=HASIL_DEFAULT, help="file JSON lines hasil (di-append)")
+    parser.add_argument('-v', '--verbose', action='store_true', help="tampilkan output tiap tahap")
+    parser.add_argument('--bandingkan', nargs=2, metavar=('LAMA', 'BARU'), help="bandingkan dua file hasil")
+    parser.add_argument('--ukur', choices=['elt', 'klasifikasi', 'init_db', 'cari_target'], help=argparse.SUPPRESS)
+    parser.add_argument('--workdir', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.ukur:
+        _jalankan_anak(args)
+    elif args.bandingkan:
+        bandingkan(*args.bandingkan)
+    else:
+        run_benchmark(args.survey, args.osm, query=args.query, chunksize=args.chunksize, seed=args.seed,
+                      data_dir=args.data_dir, output=args.output, verbose=args.verbose, daftar_workers=args.workers)
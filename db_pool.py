@@ -0,0 +1,165 @@
+import math
+import threading
+from contextlib import contextmanager
+
+import duckdb
+import numpy as np
+
+from metrics import METRICS
+
+# ==========================================
+# POOL KONEKSI DUCKDB (SATU PER PROSES)
+# ==========================================
+# Satu koneksi read-only dibuka sekali per proses. Cursor DuckDB tidak thread-safe, jadi tiap
+# query meminjam satu cursor dari pool dan mengembalikannya setelah hasilnya diambil. Cursor
+# tidak diikat ke thread: Streamlit membuat thread ScriptRunner baru tiap rerun, jadi cursor
+# per thread akan dibuat (dan di-PREPARE) ulang terus. Query yang sering dipanggil di-PREPARE
+# sekali per cursor pool, lalu cukup di-EXECUTE dengan parameter (tidak di-parse & di-plan
+# ulang tiap rerun). Maksimal `maks_idle` cursor disimpan; kelebihannya ditutup.
+
+PREPARED = {
+    'opsi_traits': "SELECT nilai FROM opsi_traits ORDER BY nilai",
+    # Top-N habitat archetype $1 dari habitat_mart. Lokasi yang mengandung salah satu kata di $2
+    # (rekomendasi_prioritas waktu) didahulukan; kalau tidak ada yang cocok, semua lokasi dipakai.
+    # Ejaan yang ditampilkan = ejaan terbanyak untuk lokasi_key tsb.
+    'habitat_top': """
+        WITH ejaan AS (
+            SELECT lokasi_key, lokasi, sum(jumlah) AS jumlah, min(urutan) AS urutan
+            FROM habitat_mart WHERE archetype = $1
+            GROUP BY lokasi_key, lokasi
+        ),
+        lokasi AS (
+            SELECT lokasi_key, first(lokasi ORDER BY jumlah DESC, urutan) AS lokasi,
+                   sum(jumlah) AS jumlah, min(urutan) AS urutan
+            FROM ejaan GROUP BY lokasi_key
+        ),
+        aturan AS (SELECT unnest(CAST($2 AS VARCHAR[])) AS kata),
+        cocok AS (
+            SELECT l.*, EXISTS (SELECT 1 FROM aturan WHERE contains(l.lokasi_key, aturan.kata)) AS cocok
+            FROM lokasi l
+        )
+        SELECT lokasi, jumlah FROM cocok
+        WHERE cocok OR NOT coalesce((SELECT bool_or(cocok) FROM cocok), false)
+        ORDER BY jumlah DESC, urutan
+        LIMIT $3
+    """,
+    'habitat_gps': """
+        SELECT nama_tempat, lat, lon, kategori FROM habitat_gps
+        WHERE habitat_key = $1
+        ORDER BY peringkat
+        LIMIT 1
+    """,
+}
+
+
+def _nilai(value):
+    # Parameter jadi tipe Python biasa (nilai dari pandas sering np.int64 / np.float64 / array),
+    # dipakai mode prepared maupun mode profil supaya keduanya menerima input yang sama
+    if isinstance(value, np.generic):
+        value = value.item()
+    elif isinstance(value, np.ndarray):
+        value = value.tolist()
+    if isinstance(value, float) and not math.isfinite(value):
+        raise ValueError(f"Parameter query harus bilangan hingga, bukan {value!r}")
+    if isinstance(value, (list, tuple)):
+        return [_nilai(v) for v in value]
+    if value is not None and not isinstance(value, (bool, int, float, str)):
+        raise TypeError(f"Tipe parameter query tidak didukung: {type(value).__name__}")
+    return value
+
+def _literal(value):
+    # Nilai parameter (sudah lewat _nilai) untuk EXECUTE: DuckDB belum bisa bind '?' ke EXECUTE dari Python
+    if value is None:
+        return 'NULL'
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    if isinstance(value, int):
+        return str(value)
+    if isinstance(value, float):
+        # Tanpa cast literal 1.5 dibaca DECIMAL; DOUBLE = tipe yang sama dengan float yang di-bind
+        return f"CAST({value!r} AS DOUBLE)"
+    if isinstance(value, list):
+        return '[' + ', '.join(_literal(v) for v in value) + ']'
+    return "'" + value.replace("'", "''") + "'"
+
+
+class DuckDBPool:
+    def __init__(self, db_file, read_only=True, maks_idle=8):
+        self.db_file = db_file
+        self.maks_idle = maks_idle
+        self._con = duckdb.connect(db_file, read_only=read_only)
+        self._lock = threading.Lock()
+        self._bebas = []  # [(cursor, set nama prepared)] yang sedang tidak dipinjam
+        self._dipinjam = {}  # id(cursor) -> cursor, ditutup kalau pool ditutup saat masih dipinjam
+
+    def _ambil(self):
+        with self._lock:
+            if self._con is None:
+                # Tipe sama dengan error DuckDB untuk koneksi yang sudah ditutup
+                raise duckdb.ConnectionException(f"Pool untuk {self.db_file} sudah ditutup")
+            if self._bebas:
+                cur, prepared = self._bebas.pop()
+            else:
+                cur, prepared = self._con.cursor(), set()
+                METRICS.hitung('duckdb.cursor_baru')
+            self._dipinjam[id(cur)] = cur
+        return cur, prepared
+
+    def _kembalikan(self, cur, prepared):
+        with self._lock:
+            self._dipinjam.pop(id(cur), None)
+            if self._con is not None and len(self._bebas) < self.maks_idle:
+                self._bebas.append((cur, prepared))
+                return
+        cur.close()
+
+    @contextmanager
+    def pinjam(self):
+        """Cursor untuk query ad-hoc; hasil harus sudah diambil sebelum blok selesai."""
+        cur, prepared = self._ambil()
+        try:
+            yield cur
+        finally:
+            self._kembalikan(cur, prepared)
+
+    def _jalankan(self, nama, params, ambil):
+        params = [_nilai(p) for p in params]
+        cur, prepared = self._ambil()
+        try:
+            if METRICS.profile_dir:
+                # Mode profil (RADAR_PROFILE_DIR): cursor anak sekali pakai, supaya PRAGMA profiling
+                # tidak ikut aktif di cursor pool yang dipakai ulang; ditutup setelah hasilnya diambil
+                anak = cur.cursor()
+                try:
+                    METRICS.aktifkan_profil(anak, nama)
+                    return ambil(anak.execute(PREPARED[nama], params))
+                finally:
+                    anak.close()
+            if nama not in prepared:
+                cur.execute(f"PREPARE {nama} AS {PREPARED[nama]}")
+                prepared.add(nama)
+                METRICS.hitung('duckdb.prepare')
+            if params:
+                return ambil(cur.execute(f"EXECUTE {nama}({', '.join(_literal(p) for p in params)})"))
+            return ambil(cur.execute(f"EXECUTE {nama}"))
+        finally:
+            self._kembalikan(cur, prepared)
+
+    def fetchall(self, nama, *params):
+        """Jalankan prepared statement `nama` (lihat PREPARED) dengan parameter berurutan $1, $2, ..."""
+        return self._jalankan(nama, params, lambda hasil: hasil.fetchall())
+
+    def fetchone(self, nama, *params):
+        return self._jalankan(nama, params, lambda hasil: hasil.fetchone())
+
+    def close(self):
+        with self._lock:
+            for cur, _ in self._bebas:
+                cur.close()
+            for cur in self._dipinjam.values():
+                cur.close()
+            self._bebas = []
+            self._dipinjam = {}
+            if self._con is not None:
+                self._con.close()
+                self._con = None
@@ -1,112 +1,908 @@
+import duckdb
 import pandas as pd
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
 import os
 import io
+import re
+import argparse
+import json
 import shutil
+import hashlib
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from metrics import METRICS, span
+from kota import DAFTAR_KOTA, KOTA_DEFAULT, get_kota
 
 # --- KONFIGURASI PATH ---
+# Data lake dipartisi per kota: datalake/kota=<kode>/{bronze,silver,gold} (lihat kota.py).
+# Konstanta di bawah = path kota default (dipakai benchmark & pemakaian satu kota).
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-RAW_SOURCE = BASE_DIR
-LAKE_BRONZE = os.path.join(BASE_DIR, 'datalake', 'bronze')
-LAKE_SILVER = os.path.join(BASE_DIR, 'datalake', 'silver')
-LAKE_GOLD = os.path.join(BASE_DIR, 'datalake', 'gold')
+LAKE_BRONZE = KOTA_DEFAULT.bronze
+LAKE_SILVER = KOTA_DEFAULT.silver
+LAKE_GOLD = KOTA_DEFAULT.gold
+GOLD_LOCATIONS = KOTA_DEFAULT.gold_locations
+HABITAT_MART = KOTA_DEFAULT.habitat_mart
+MANIFEST_PATH = KOTA_DEFAULT.manifest
+
+# --- FORMAT PARQUET (SILVER & GOLD) ---
+# Data ditulis terurut per kunci filter (archetype/gender, kategori, habitat_key) supaya statistik
+# min/max per row group bisa dipakai reader (DuckDB, pyarrow) untuk melewati row group yang tidak cocok.
+# Urutan asli baris tetap disimpan (kolom no_baris / urutan) karena tie-break engine bergantung padanya.
+# Kolom teks memakai dictionary encoding + zstd; kolom urutan (naik per kunci) memakai delta encoding.
+# Tipe ENUM dibuat saat build DuckDB. Row group 16k baris: cukup kecil supaya satu archetype/gender
+# di satu file partisi tanggal bisa dilewati, cukup besar supaya full scan tidak kena overhead per row group.
+ROW_GROUP = 16_384
+KOLOM_DELTA = ('no_baris', 'urutan')
+URUT_GOLD = ['archetype', 'gender']
+
+def tulis_arrow(tabel, path, row_group=ROW_GROUP):
+    # Ditulis ke file sementara lalu di-rename: reader (build DB, ELT berikutnya) tidak pernah melihat
+    # parquet setengah jadi. Akhiran .tmp tidak ikut glob *.parquet maupun fingerprint engine
+    delta = [k for k in tabel.column_names if k in KOLOM_DELTA]
+    tmp = path + '.tmp'
+    pq.write_table(tabel, tmp, row_group_size=row_group, compression='zstd', write_statistics=True,
+                   use_dictionary=[k for k in tabel.column_names if k not in delta],
+                   column_encoding={k: 'DELTA_BINARY_PACKED' for k in delta} or None)
+    os.replace(tmp, path)
+
+def tulis_parquet(df, path, urut=None, row_group=ROW_GROUP):
+    # Sort stabil: baris dengan kunci sama tetap dalam urutan asli
+    if urut:
+        df = df.sort_values(urut, kind='stable')
+    tulis_arrow(pa.Table.from_pandas(df, preserve_index=False), path, row_group)
+
+def _part_id(path):
+    # part-<offset byte awal chunk>.parquet; satu chunk bisa terpecah ke beberapa partisi tanggal
+    return int(re.search(r'part-(\d+)', os.path.basename(path)).group(1))
+
+def baca_gold(gold_locations=GOLD_LOCATIONS, columns=None):
+    """Gold survey dalam urutan baris export (offset part, lalu no_baris), sama dengan kolom `baris` tb_survey di engine.
+
+    Bukan urutan path: export tidak selalu kronologis, jadi satu part bisa tersebar ke beberapa partisi tanggal.
+    """
+    parts = {}
+    for r, _, fs in os.walk(gold_locations):
+        for f in fs:
+            if f.endswith('.parquet'):
+                parts.setdefault(_part_id(f), []).append(os.path.join(r, f))
+    frames = []
+    for part_id in sorted(parts):
+        potongan = []
+        for path in sorted(parts[part_id]):
+            ada = pq.read_schema(path).names
+            potongan.append(pd.read_parquet(path, columns=[k for k in columns + ['no_baris'] if k in ada] if columns else None))
+        df = pd.concat(potongan, ignore_index=True)
+        # Part lama (sebelum ditulis terurut) tidak punya no_baris: urutan per file saja
+        if 'no_baris' in df.columns:
+            df = df.sort_values('no_baris', kind='stable').drop(columns='no_baris')
+        frames.append(df)
+    if not frames:
+        return pd.DataFrame(columns=columns)
+    return pd.concat(frames, ignore_index=True)
+
+def _unquote_line(line):
+    s_line = line.strip()
+    if s_line.startswith('"') and s_line.endswith('"'):
+        return s_line[1:-1].replace('""', '"')
+    return s_line
+
+class QuoteRepairReader(io.TextIOBase):
+    """File-like teks yang membuang outer quoting ala Google Forms baris per baris (streaming).
+
+    Bisa langsung dikasih ke pd.read_csv; memori yang dipakai hanya sebesar buffer baca parser,
+    bukan 3 salinan isi file seperti versi readlines() + join + StringIO.
+    """
+
+    def __init__(self, file_path, encoding='utf-8'):
+        self._f = open(file_path, 'rb')
+        self._encoding = encoding
+        self._buf = ''
+        # Jumlah byte mentah yang sudah dikonsumsi (untuk offset incremental)
+        self.posisi = 0
+
+    def readable(self):
+        return True
+
+    def _baris_berikut(self):
+        raw = self._f.readline()
+        if not raw:
+            return ''
+        self.posisi += len(raw)
+        return _unquote_line(raw.decode(self._encoding)) + '\n'
 
-os.makedirs(LAKE_BRONZE, exist_ok=True)
-os.makedirs(LAKE_SILVER, exist_ok=True)
-os.makedirs(LAKE_GOLD, exist_ok=True)
+    def seek_raw(self, offset, prefix=''):
+        # Lompat ke byte mentah `offset`; `prefix` (mis. header) dibaca duluan sebelum isi file
+        self._f.seek(offset)
+        self.posisi = offset
+        self._buf = prefix
+
+    def readline(self, size=-1):
+        if self._buf:
+            i = self._buf.find('\n')
+            if i >= 0:
+                line, self._buf = self._buf[:i + 1], self._buf[i + 1:]
+                return line
+            line, self._buf = self._buf + self._baris_berikut(), ''
+            return line
+        return self._baris_berikut()
+
+    def read(self, size=-1):
+        parts = [self._buf]
+        n = len(self._buf)
+        self._buf = ''
+        while size is None or size < 0 or n < size:
+            line = self._baris_berikut()
+            if not line:
+                break
+            parts.append(line)
+            n += len(line)
+        data = ''.join(parts)
+        if size is not None and 0 <= size < len(data):
+            data, self._buf = data[:size], data[size:]
+        return data
+
+    def close(self):
+        self._f.close()
+        super().close()
 
 def clean_csv_quotes(file_path):
     try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            lines = f.readlines()
-        cleaned_lines = []
-        for line in lines:
-            s_line = line.strip()
-            if s_line.startswith('"') and s_line.endswith('"'):
-                content = s_line[1:-1].replace('""', '"')
-                cleaned_lines.append(content)
-            else:
-                cleaned_lines.append(s_line)
-        return io.StringIO("\n".join(cleaned_lines))
+        return QuoteRepairReader(file_path)
     except Exception as e:
         print(f"Error reading file {file_path}: {e}")
         return None
 
+# ==========================================
+# KLASIFIKASI ARCHETYPE DARI CIRI FISIK
+# ==========================================
+# Tabel keyword -> archetype ada di archetype_keywords.csv; urutan baris = prioritas (archetype yang
+# muncul duluan menang kalau beberapa cocok, sama dengan if berurutan di get_archetype lama).
+# Keyword tiap archetype dikompilasi jadi satu regex gabungan lalu dicocokkan ke seluruh kolom
+# sekaligus (str.contains), bukan any(k in text) per baris per keyword.
+ARCHETYPE_KEYWORDS = os.path.join(BASE_DIR, 'archetype_keywords.csv')
+ARCHETYPE_DEFAULT = 'General Type'
+
+def muat_keyword_archetype(path=ARCHETYPE_KEYWORDS):
+    """[(archetype, [keyword, ...])] sesuai urutan prioritas di file."""
+    if not os.path.exists(path):
+        print(f"⚠️ {path} tidak ada, semua baris diklasifikasi '{ARCHETYPE_DEFAULT}'.")
+        return []
+    df = pd.read_csv(path, dtype=str).dropna()
+    tabel = {}
+    for keyword, archetype in zip(df['keyword'].str.strip().str.lower(), df['archetype'].str.strip()):
+        if keyword and keyword not in tabel.setdefault(archetype, []):
+            tabel[archetype].append(keyword)
+    return list(tabel.items())
+
+def kompilasi_keyword(tabel):
+    # Satu pola alternation per archetype (keyword di-escape, jadi dicocokkan sebagai substring biasa)
+    return [(archetype, '|'.join(re.escape(k) for k in keywords)) for archetype, keywords in tabel]
+
+KEYWORD_ARCHETYPE = muat_keyword_archetype()
+POLA_ARCHETYPE = kompilasi_keyword(KEYWORD_ARCHETYPE)
+# Disimpan di manifest: kalau tabel keyword berubah, inferred_archetype di gold dihitung ulang
+FINGERPRINT_KEYWORD = hashlib.sha1(json.dumps(KEYWORD_ARCHETYPE).encode()).hexdigest()
+
+def klasifikasi_archetype(teks, pola=None):
+    """Archetype hasil tebakan dari teks ciri fisik (Series), vektor per archetype.
+
+    Jawaban checkbox survey banyak yang sama persis, jadi yang dicocokkan cuma nilai uniknya;
+    baris yang sudah cocok dengan archetype prioritas lebih tinggi tidak dicek lagi.
+    """
+    pola = POLA_ARCHETYPE if pola is None else pola
+    teks = pd.Series(teks)
+    kode, unik = pd.factorize(teks.fillna(''))
+    hasil = np.full(len(unik), ARCHETYPE_DEFAULT, dtype=object)
+    unik = pd.Series(unik, dtype=object).astype(str).str.lower()
+    sisa = np.arange(len(unik))
+    for archetype, p in pola:
+        if not len(sisa):
+            break
+        cocok = unik.iloc[sisa].str.contains(p, regex=True).to_numpy(dtype=bool)
+        hasil[sisa[cocok]] = archetype
+        sisa = sisa[~cocok]
+    return pd.Series(hasil[kode], index=teks.index, dtype=object)
+
 def get_archetype(text):
-    text = str(text).lower()
-    if any(k in text for k in ['kaca', 'buku', 'laptop', 'seminar', 'kemeja']): 
-        return 'Intellectual'
-    if any(k in text for k in ['branded', 'heels', 'parfum', 'makeup', 'branded']): 
-        return 'Social'
-    if any(k in text for k in ['jersey', 'training', 'sneaker', 'running']): 
-        return 'Sporty'
-    if any(k in text for k in ['kamera', 'analog', 'seni', 'art', 'batik']): 
-        return 'Creative'
-    if any(k in text for k in ['organisasi', 'id card', 'kpu']):
-        return 'Active'
-    return 'General Type'
-
-def run_elt():
-    print("🚀 MEMULAI PROSES ELT...")
-
-    # --- 1. EXTRACT & LOAD ---
-    files = ['hasil_survey.csv', 'social_time_rules.csv', 'lokasi_bjm.json']
-    for f in files:
-        src = os.path.join(RAW_SOURCE, f)
-        dst = os.path.join(LAKE_BRONZE, f)
-        if os.path.exists(src):
-            shutil.copy(src, dst)
-            print(f"✅ [LOAD] {f} masuk ke Bronze.")
-
-    # --- 2. TRANSFORM (Bronze ke Gold via Unpivot) ---
-print("⚙️ [TRANSFORM] Memproses Data Survey...")
-survey_path = os.path.join(LAKE_BRONZE, 'hasil_survey.csv')
-csv_content = clean_csv_quotes(survey_path)
-
-if csv_content:
-    df_survey = pd.read_csv(csv_content)
-    
-    categories = [
-        ('intel', 'Intellectual'), ('creative', 'Creative'), 
-        ('social', 'Social'), ('sporty', 'Sporty'), 
-        ('techie', 'Techie'), ('relig', 'Religius'), 
-        ('active', 'Active')
-    ]
-    
-    melted_data = []
-    for _, row in df_survey.iterrows():
-        for cat_prefix, cat_name in categories:
-            # Menggabungkan ciri fisik cowo & cewe untuk kategori terkait
-            t_cowo = str(row.get(f'{cat_prefix}_fisik_cowo', '')).replace('nan', '')
-            t_cewe = str(row.get(f'{cat_prefix}_fisik_cewe', '')).replace('nan', '')
-            traits = (t_cowo + ", " + t_cewe).strip(", ")
-            
-            # Mengambil lokasi spesifik kategori
-            lokasi = str(row.get(f'{cat_prefix}_lokasi', '')).replace('nan', '')
-            
-            # Hanya masukkan ke Gold jika ada data (tidak kosong)
-            if traits.strip() or lokasi.strip():
-                melted_data.append({
-                    'timestamp': row['timestamp'],
-                    'gender': row['gender'],
-                    'archetype': cat_name,
-                    'ciri_fisik': traits,
-                    'habitat_pilihan': lokasi
-                })
-
-    if melted_data:
-        df_gold = pd.DataFrame(melted_data)
-        # Simpan ke Gold Layer
-        gold_path = os.path.join(LAKE_GOLD, 'locations.parquet')
-        df_gold.to_parquet(gold_path, index=False)
-        print(f"✅ [SUCCESS] Gold Layer tersimpan di: {gold_path}")
-
-    # Proses Social Rules (Silver)
-rules_path = os.path.join(LAKE_BRONZE, 'social_time_rules.csv')
-csv_rules = clean_csv_quotes(rules_path)
-if csv_rules:
-        pd.read_csv(csv_rules).to_parquet(os.path.join(LAKE_SILVER, 'rules_data.parquet'), index=False)
-
-print("🏁 ELT SELESAI.")
+    return klasifikasi_archetype([text]).iloc[0]
+
+def klasifikasi_ulang_part(path):
+    # Tulis ulang satu part gold dengan inferred_archetype dari tabel keyword sekarang
+    df = pd.read_parquet(path)
+    df['inferred_archetype'] = klasifikasi_archetype(df['ciri_fisik'])
+    # Part lama tanpa no_baris tidak diurutkan: urutan barisnya di file adalah satu-satunya urutan asli
+    tulis_parquet(df, path, URUT_GOLD if 'no_baris' in df.columns else None)
+    return len(df)
+
+# ==========================================
+# OSM: OVERPASS JSON -> SILVER (STREAMING)
+# ==========================================
+OSM_SILVER = KOTA_DEFAULT.osm_silver
+OSM_SCHEMA = pa.schema([
+    ('nama_tempat', pa.string()), ('lat', pa.float64()), ('lon', pa.float64()),
+    ('kategori', pa.string()), ('osm_type', pa.string()), ('osm_id', pa.int64())
+])
+# Batas memori DuckDB saat mengurutkan silver OSM; lebihnya di-spill ke disk
+MEMORI_SORT_OSM = '256MB'
+_RE_ELEMENTS = re.compile(r'"elements"\s*:\s*\[')
+_RE_PEMISAH = re.compile(r'[\s,]*')
+
+def iter_overpass_elements(path, chunk_chars=1 << 20):
+    """Yield tiap objek di array `elements` satu per satu; file tidak pernah dimuat utuh ke memori."""
+    decoder = json.JSONDecoder()
+    with open(path, 'r', encoding='utf-8') as f:
+        buf = ''
+        while True:
+            m = _RE_ELEMENTS.search(buf)
+            if m:
+                buf = buf[m.end():]
+                break
+            chunk = f.read(chunk_chars)
+            if not chunk:
+                return
+            # Sisakan ekor buffer, siapa tahu key "elements" kepotong di batas chunk
+            buf = buf[-64:] + chunk
+
+        pos = 0
+        while True:
+            pos = _RE_PEMISAH.match(buf, pos).end()
+            if pos >= len(buf):
+                chunk = f.read(chunk_chars)
+                if not chunk:
+                    return
+                buf, pos = buf[pos:] + chunk, 0
+                continue
+            if buf[pos] == ']':
+                return
+            try:
+                el, end = decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError:
+                # Objek kepotong di akhir buffer -> tambah chunk lalu coba lagi
+                chunk = f.read(chunk_chars)
+                if not chunk:
+                    raise
+                buf, pos = buf[pos:] + chunk, 0
+                continue
+            yield el
+            pos = end
+
+def _osm_place(el):
+    tags = el.get('tags', {})
+    name = tags.get('name')
+    # Kita butuh tempat yang ada namanya
+    if not name:
+        return None
+    kategori = tags.get('amenity') or tags.get('shop') or tags.get('leisure') or tags.get('tourism') or 'unknown'
+    lat = el.get('lat')
+    lon = el.get('lon')
+    # Tipe 'way'/'relation' (bangunan) koordinatnya ada di 'center'
+    if not lat and 'center' in el:
+        lat = el['center']['lat']
+        lon = el['center']['lon']
+    if not (lat and lon):
+        return None
+    return (name, lat, lon, kategori, el.get('type'), el.get('id'))
+
+def build_osm_silver(osm_path, out_path=OSM_SILVER, batch_size=100_000, memori=MEMORI_SORT_OSM):
+    # Ditulis per batch kolumnar ke file sementara (urutan asli), lalu diurutkan per kategori oleh DuckDB
+    # (COPY ... ORDER BY, spill ke disk di atas `memori`), jadi tabel penuh tidak pernah dimuat ke memori.
+    # Urutan asli disimpan di kolom `urutan` (dipakai build_habitat_gps); hasil di-rename setelah lengkap
+    mentah = out_path + '.batch.tmp'
+    kolom = OSM_SCHEMA.names
+    batch = {k: [] for k in kolom}
+    total = 0
+    with pq.ParquetWriter(mentah, OSM_SCHEMA) as writer:
+        for el in iter_overpass_elements(osm_path):
+            place = _osm_place(el)
+            if place is None:
+                continue
+            for k, v in zip(kolom, place):
+                batch[k].append(v)
+            if len(batch['nama_tempat']) >= batch_size:
+                writer.write_table(pa.table(batch, schema=OSM_SCHEMA))
+                total += len(batch['nama_tempat'])
+                batch = {k: [] for k in kolom}
+        total += len(batch['nama_tempat'])
+        writer.write_table(pa.table(batch, schema=OSM_SCHEMA))
+    tmp = out_path + '.tmp'
+    spill = out_path + '.spill'
+    con = duckdb.connect()
+    try:
+        con.execute(f"SET memory_limit = '{memori}'")
+        con.execute(f"SET temp_directory = '{spill}'")
+        # zstd & row group ROW_GROUP seperti tulis_arrow; parquet v2: dictionary untuk teks berulang (kategori),
+        # delta untuk kolom integer (urutan, osm_id)
+        con.execute(f"""
+            COPY (
+                SELECT {', '.join(OSM_SCHEMA.names)}, file_row_number AS urutan
+                FROM read_parquet('{mentah}', file_row_number = true)
+                ORDER BY kategori, urutan
+            ) TO '{tmp}' (FORMAT parquet, COMPRESSION zstd, ROW_GROUP_SIZE {ROW_GROUP}, PARQUET_VERSION v2)
+        """)
+    finally:
+        con.close()
+        shutil.rmtree(spill, ignore_errors=True)
+    os.remove(mentah)
+    os.replace(tmp, out_path)
+    return total
+
+def load_osm_places(path=OSM_SILVER):
+    # Urutan asli Overpass (silver disimpan terurut per kategori)
+    df = pd.read_parquet(path, columns=['nama_tempat', 'lat', 'lon', 'kategori', 'urutan'])
+    return df.sort_values('urutan', kind='stable').drop(columns='urutan').reset_index(drop=True)
+
+def _trigrams(text):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+def build_habitat_gps(habitat_series, df_osm, top_n=5, ambang_trigram=0.6, skip_keys=()):
+    # Kosakata habitat: item hasil split koma, sama persis dengan yang dipakai cari_target
+    habitats = {}
+    for loc_str in habitat_series.dropna():
+        for item in str(loc_str).split(','):
+            item = item.strip()
+            if item and item.lower() not in habitats and item.lower() not in skip_keys:
+                habitats[item.lower()] = item
+
+    names = [str(n).lower() for n in df_osm['nama_tempat']]
+    name_tri = [_trigrams(n) for n in names]
+
+    # Inverted index trigram -> id tempat OSM
+    posting = {}
+    for idx, tris in enumerate(name_tri):
+        for t in tris:
+            posting.setdefault(t, []).append(idx)
+    nama_pendek = [idx for idx, tris in enumerate(name_tri) if not tris]
+
+    rows = []
+    for key, habitat in habitats.items():
+        h_tri = _trigrams(key)
+        # Hitung trigram bersama per kandidat (cuma tempat yang berbagi minimal 1 trigram)
+        shared = {}
+        for t in h_tri:
+            for idx in posting.get(t, ()):
+                shared[idx] = shared.get(idx, 0) + 1
+
+        hasil = []
+        kandidat = set(shared) | set(nama_pendek)
+        if len(key) < 3:
+            # Habitat < 3 huruf tidak punya trigram, cek substring langsung
+            kandidat = range(len(names))
+        for idx in kandidat:
+            n = names[idx]
+            # Sama dengan LIKE dua arah yang lama: habitat di dalam nama, atau nama di dalam habitat
+            if key in n or n in key:
+                hasil.append((0, -1.0, idx, 1.0, 'substring'))
+                continue
+            inter = shared.get(idx, 0)
+            if inter:
+                skor = inter / (len(h_tri) + len(name_tri[idx]) - inter)
+                if skor >= ambang_trigram:
+                    hasil.append((1, -skor, idx, skor, 'trigram'))
+
+        # Substring dulu (urutan asli OSM = hasil LIMIT 1 lama), lalu trigram by skor
+        hasil.sort(key=lambda x: (x[0], x[1], x[2]))
+        for peringkat, (_, _, idx, skor, metode) in enumerate(hasil[:top_n], start=1):
+            osm = df_osm.iloc[idx]
+            rows.append({
+                'habitat': habitat,
+                'habitat_key': key,
+                'nama_tempat': osm['nama_tempat'],
+                'lat': osm['lat'],
+                'lon': osm['lon'],
+                'kategori': osm['kategori'],
+                'skor': round(skor, 4),
+                'metode': metode,
+                'peringkat': peringkat
+            })
+
+    return pd.DataFrame(rows, columns=['habitat', 'habitat_key', 'nama_tempat', 'lat', 'lon',
+                                       'kategori', 'skor', 'metode', 'peringkat'])
+
+# ==========================================
+# MANIFEST (INCREMENTAL LOAD)
+# ==========================================
+def load_manifest(path=MANIFEST_PATH):
+    if os.path.exists(path):
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    return {'files': {}, 'survey': {'offset': 0}}
+
+def save_manifest(manifest, path=MANIFEST_PATH):
+    # Tulis ke file sementara dulu supaya manifest tidak pernah setengah jadi
+    tmp = path + '.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp, path)
+
+def _sha256_prefix(path, prefix_len):
+    # Satu kali baca: hash prefix (ukuran file versi lama) + hash seluruh file
+    h = hashlib.sha256()
+    sha_prefix = None
+    with open(path, 'rb') as f:
+        if prefix_len is not None:
+            sisa = prefix_len
+            while sisa > 0:
+                chunk = f.read(min(1 << 20, sisa))
+                if not chunk:
+                    break
+                h.update(chunk)
+                sisa -= len(chunk)
+            sha_prefix = h.hexdigest()
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            h.update(chunk)
+    return sha_prefix, h.hexdigest()
+
+def sync_bronze(src, dst, manifest):
+    """Salin satu file raw ke Bronze hanya kalau berubah. Return (status, entri manifest baru / None).
+
+    status: 'skip', 'append' atau 'full'. Manifest tidak diubah di sini: entri baru baru dicatat pemanggil
+    setelah transform file tsb berhasil, jadi file yang gagal di-transform dicoba lagi di run berikutnya.
+    """
+    nama = os.path.basename(src)
+    if not os.path.exists(src):
+        return 'skip', None
+
+    stat = os.stat(src)
+    lama = manifest['files'].get(nama)
+    if lama and os.path.exists(dst) and lama['size'] == stat.st_size and lama['mtime'] == stat.st_mtime:
+        return 'skip', None
+
+    prefix_len = lama['size'] if lama and lama['size'] <= stat.st_size else None
+    sha_prefix, sha = _sha256_prefix(src, prefix_len)
+    entry = {'size': stat.st_size, 'mtime': stat.st_mtime, 'sha256': sha}
+
+    if lama and os.path.exists(dst) and lama['sha256'] == sha:
+        # Cuma mtime yang berubah (mis. di-touch / di-copy ulang)
+        return 'skip', entry
+
+    if lama and os.path.exists(dst) and sha_prefix == lama['sha256']:
+        # Export lama + baris baru di belakang: salin byte barunya saja. Bronze dipotong dulu ke ukuran
+        # lama, jadi ekor yang sudah tersalin di run yang gagal tidak tertulis dua kali
+        with open(src, 'rb') as f_src, open(dst, 'r+b') as f_dst:
+            f_dst.truncate(lama['size'])
+            f_dst.seek(lama['size'])
+            f_src.seek(lama['size'])
+            shutil.copyfileobj(f_src, f_dst)
+        status = 'append'
+    else:
+        shutil.copy(src, dst)
+        status = 'full'
+    return status, entry
+
+def catat_manifest(manifest, kota, entri, ok):
+    # Entri baru hanya untuk file yang transform-nya berhasil. File yang gagal dihapus dari manifest:
+    # Bronze-nya sudah tidak sama dengan versi terakhir yang berhasil, jadi run berikutnya memproses ulang (full)
+    for jenis, src in kota.raw.items():
+        nama = os.path.basename(src)
+        if not ok[jenis]:
+            print(f"⚠️ [LOAD] {nama} gagal di-transform, diproses ulang di run berikutnya.")
+            manifest['files'].pop(nama, None)
+        elif entri.get(jenis) is not None:
+            manifest['files'][nama] = entri[jenis]
+
+# ==========================================
+# SURVEY: BRONZE -> GOLD (PARTISI PER TANGGAL)
+# ==========================================
+SURVEY_CATEGORIES = [
+    ('intel', 'Intellectual'), ('creative', 'Creative'), 
+    ('social', 'Social'), ('sporty', 'Sporty'), 
+    ('techie', 'Techie'), ('relig', 'Religius'), 
+    ('active', 'Active')
+]
+
+def _teks(kolom):
+    # Setara str(x).replace('nan', '') per sel, tapi sekaligus satu kolom
+    teks = kolom.astype(object).where(kolom.notna(), '').astype(str)
+    return teks.str.replace('nan', '', regex=False)
+
+def unpivot_survey(df_survey):
+    # Unpivot kolom <kategori>_fisik_cowo / _fisik_cewe / _lokasi secara kolumnar:
+    # matriks (n_baris x n_kategori) di-ravel row-major -> urutan sama dengan loop per baris lalu per kategori
+    kolom_gold = ['timestamp', 'gender', 'archetype', 'ciri_fisik', 'habitat_pilihan']
+    n = len(df_survey)
+    if n == 0:
+        return pd.DataFrame(columns=kolom_gold)
+
+    kosong = pd.Series([''] * n, index=df_survey.index, dtype=object)
+    def ambil(nama):
+        return _teks(df_survey[nama]) if nama in df_survey.columns else kosong
+
+    names = [cat_name for _, cat_name in SURVEY_CATEGORIES]
+    cowo = pd.DataFrame({name: ambil(f'{p}_fisik_cowo') for p, name in SURVEY_CATEGORIES})
+    cewe = pd.DataFrame({name: ambil(f'{p}_fisik_cewe') for p, name in SURVEY_CATEGORIES})
+    lokasi = pd.DataFrame({name: ambil(f'{p}_lokasi') for p, name in SURVEY_CATEGORIES})
+
+    # Menggabungkan ciri fisik cowo & cewe untuk kategori terkait
+    traits = (cowo + ", " + cewe).apply(lambda kol: kol.str.strip(", "))
+
+    k = len(names)
+    df_gold = pd.DataFrame({
+        'timestamp': np.repeat(df_survey['timestamp'].to_numpy(), k),
+        'gender': np.repeat(df_survey['gender'].to_numpy(), k),
+        'archetype': np.tile(np.array(names, dtype=object), n),
+        'ciri_fisik': traits.to_numpy().ravel(),
+        'habitat_pilihan': lokasi.to_numpy().ravel()
+    })
+
+    # Hanya masukkan ke Gold jika ada data (tidak kosong)
+    ada_isi = (df_gold['ciri_fisik'].str.strip() != '') | (df_gold['habitat_pilihan'].str.strip() != '')
+    return df_gold[ada_isi].reset_index(drop=True)
+
+def agregasi_habitat(df_gold, urutan_awal=0):
+    """Hitung frekuensi habitat per (archetype, gender, lokasi) dari baris gold.
+
+    habitat_pilihan dipecah per koma (sama dengan yang dulu dilakukan cari_target tiap request),
+    lokasi_key = lokasi huruf kecil (kunci yang sama dengan habitat_gps). `urutan` = nomor kemunculan
+    pertama, dipakai sebagai tie-break top-N (sama dengan urutan Counter.most_common yang lama).
+    """
+    kolom = ['archetype', 'gender', 'lokasi_key', 'lokasi', 'jumlah', 'urutan']
+    item = df_gold[['archetype', 'gender']].copy()
+    item['lokasi'] = df_gold['habitat_pilihan'].astype(str).str.split(',')
+    item = item.explode('lokasi')
+    item['lokasi'] = item['lokasi'].str.strip()
+    item = item[item['lokasi'].notna() & (item['lokasi'] != '')]
+    if item.empty:
+        return pd.DataFrame(columns=kolom)
+    item['lokasi_key'] = item['lokasi'].str.lower()
+    item['urutan'] = np.arange(urutan_awal, urutan_awal + len(item), dtype=np.int64)
+    mart = (item.groupby(['archetype', 'gender', 'lokasi_key', 'lokasi'], sort=False, dropna=False)
+                .agg(jumlah=('urutan', 'size'), urutan=('urutan', 'min'))
+                .reset_index())
+    return mart[kolom]
+
+def gabung_habitat_mart(daftar_mart):
+    # Gabung hasil agregasi beberapa batch (mart lama + chunk baru): jumlah dijumlah, urutan ambil yang pertama
+    mart = pd.concat(daftar_mart, ignore_index=True)
+    mart = (mart.groupby(['archetype', 'gender', 'lokasi_key', 'lokasi'], sort=False, dropna=False)
+                .agg(jumlah=('jumlah', 'sum'), urutan=('urutan', 'min'))
+                .reset_index())
+    return mart.sort_values(['archetype', 'lokasi_key', 'urutan'], kind='stable').reset_index(drop=True)
+
+def iter_survey_teks(path, offset=0, chunksize=None):
+    """Baca survey mulai byte `offset` per `chunksize` baris sebagai teks CSV (header + baris). Yield (teks, byte_awal, byte_akhir)."""
+    with QuoteRepairReader(path) as reader:
+        header = reader.readline()
+        reader.seek_raw(max(offset, reader.posisi))
+        awal = reader.posisi
+        buf = []
+        for line in reader:
+            if line.strip():
+                buf.append(line)
+            if len(buf) >= chunksize:
+                yield header + "".join(buf), awal, reader.posisi
+                awal = reader.posisi
+                buf = []
+        if buf:
+            yield header + "".join(buf), awal, reader.posisi
+
+def iter_survey_chunks(path, offset=0, chunksize=None):
+    """Baca survey mulai byte `offset`, per `chunksize` baris (None = sekaligus). Yield (df_survey, byte_awal, byte_akhir)."""
+    if chunksize:
+        for teks, awal, akhir in iter_survey_teks(path, offset, chunksize):
+            yield pd.read_csv(io.StringIO(teks)), awal, akhir
+        return
+
+    with QuoteRepairReader(path) as reader:
+        header = reader.readline()
+        # Mode sekaligus: header disisipkan lagi di depan stream supaya parser tetap kenal nama kolom,
+        # parser baca langsung dari stream, tanpa salinan teks penuh di memori
+        reader.seek_raw(max(offset, reader.posisi), prefix=header)
+        awal = reader.posisi
+        yield pd.read_csv(reader), awal, reader.posisi
+
+def tulis_partisi_gold(df_gold, part_id, gold_locations=GOLD_LOCATIONS):
+    # Partisi hive: gold/locations/tanggal=YYYY-MM-DD/part-<offset>.parquet
+    # part_id = offset byte awal batch, di-pad supaya urutan nama file = urutan data masuk.
+    # Isi tiap part terurut per URUT_GOLD; no_baris = urutan baris asli di dalam chunk (berlanjut lintas partisi tanggal)
+    df_gold = df_gold.assign(no_baris=np.arange(len(df_gold), dtype=np.int64))
+    tanggal = (pd.to_datetime(df_gold['timestamp'], format='%m/%d/%Y %H:%M:%S', errors='coerce')
+                 .dt.strftime('%Y-%m-%d')
+                 .fillna('unknown'))
+    for tgl, df_part in df_gold.groupby(tanggal, sort=True):
+        folder = os.path.join(gold_locations, f'tanggal={tgl}')
+        os.makedirs(folder, exist_ok=True)
+        tulis_parquet(df_part, os.path.join(folder, f'part-{part_id:015d}.parquet'), URUT_GOLD)
+    return tanggal.nunique()
+
+def transform_chunk_survey(df_survey, awal, kumpul_mart=False, gold_locations=GOLD_LOCATIONS):
+    """Unpivot satu chunk survey & tulis part gold-nya. Return (n_gold, habitat unik, agregasi habitat / None).
+
+    `urutan` di agregasi habitat dimulai dari 0 per chunk; digeser pemanggil sesuai urutan chunk.
+    """
+    with span('elt.survey.unpivot') as s:
+        df_chunk = unpivot_survey(df_survey)
+        s['rows'] = len(df_chunk)
+    if df_chunk.empty:
+        return 0, set(), None
+    with span('elt.survey.klasifikasi') as s:
+        df_chunk['inferred_archetype'] = klasifikasi_archetype(df_chunk['ciri_fisik'])
+        s['rows'] = len(df_chunk)
+    with span('elt.survey.tulis_gold') as s:
+        tulis_partisi_gold(df_chunk, awal, gold_locations)
+        s['rows'] = len(df_chunk)
+    mart = agregasi_habitat(df_chunk) if kumpul_mart else None
+    return len(df_chunk), set(df_chunk['habitat_pilihan'].dropna().unique()), mart
+
+def _transform_teks_survey(teks, awal, kumpul_mart, gold_locations):
+    # Dijalankan di worker: parsing CSV chunk ikut paralel, proses utama cuma membaca baris mentah
+    with span('elt.survey.baca') as s:
+        df_survey = pd.read_csv(io.StringIO(teks))
+        s['rows'] = len(df_survey)
+    return transform_chunk_survey(df_survey, awal, kumpul_mart, gold_locations)
+
+def transform_rules(rules_path, rules_out):
+    csv_rules = clean_csv_quotes(rules_path)
+    if csv_rules:
+        # Reader streaming: error decode baru muncul saat parsing, jadi ditangkap di sini
+        with span('elt.rules') as s:
+            try:
+                with csv_rules:
+                    df_rules = pd.read_csv(csv_rules)
+                    # Tidak diurutkan: rule pertama yang cocok menang
+                    tulis_parquet(df_rules, rules_out)
+                s['rows'], s['bytes'] = len(df_rules), csv_rules.posisi
+                return True
+            except Exception as e:
+                print(f"Error reading file {rules_path}: {e}")
+    return False
+
+def transform_osm(osm_path, out_path=OSM_SILVER):
+    with span('elt.osm') as s:
+        n_osm = build_osm_silver(osm_path, out_path)
+        s['rows'], s['bytes'] = n_osm, os.path.getsize(osm_path)
+    return n_osm
+
+# ==========================================
+# PARALEL (PROCESS POOL)
+# ==========================================
+# Survey, rules dan OSM tidak saling bergantung, jadi dengan workers > 1 dikerjakan bersamaan
+# di process pool, dan survey dipecah per `chunksize` baris ke beberapa core. Tiap chunk menulis
+# part gold sendiri (nama file = offset byte awal chunk) dan hasilnya digabung sesuai urutan chunk,
+# jadi isi gold/silver sama persis dengan run serial ber-chunksize sama, apa pun urutan selesainya.
+# Span yang dicatat di worker hanya masuk sink jsonl (ringkasan di proses utama tidak melihatnya).
+CHUNKSIZE_PARALEL = 50_000
+
+class _TugasSerial:
+    # Pengganti Future untuk mode serial: fungsi baru dijalankan saat result() dipanggil,
+    # jadi urutan kerja sama dengan ELT serial yang lama
+    def __init__(self, fn, args):
+        self._fn = fn
+        self._args = args
+
+    def result(self):
+        return self._fn(*self._args)
+
+class _PoolSerial:
+    def submit(self, fn, *args):
+        return _TugasSerial(fn, args)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+def buat_pool(workers):
+    return ProcessPoolExecutor(max_workers=workers) if workers > 1 else _PoolSerial()
+
+def _hasil_survey(pool, workers, survey_path, offset, chunksize, kumpul_mart, gold_locations):
+    """Yield (n_gold, habitat, mart, byte_akhir) per chunk, selalu dalam urutan chunk."""
+    if workers <= 1:
+        chunks = iter_survey_chunks(survey_path, offset, chunksize)
+        while True:
+            with span('elt.survey.baca') as s:
+                item = next(chunks, None)
+                if item is None: break
+                df_survey, awal, akhir = item
+                s['rows'], s['bytes'] = len(df_survey), akhir - awal
+            yield transform_chunk_survey(df_survey, awal, kumpul_mart, gold_locations) + (akhir,)
+        return
+
+    # Chunk yang menunggu dibatasi 2x workers supaya memori tidak ikut naik sebesar file
+    antrean = deque()
+    for teks, awal, akhir in iter_survey_teks(survey_path, offset, chunksize or CHUNKSIZE_PARALEL):
+        antrean.append((pool.submit(_transform_teks_survey, teks, awal, kumpul_mart, gold_locations), akhir))
+        if len(antrean) >= 2 * workers:
+            tugas, akhir_chunk = antrean.popleft()
+            yield tugas.result() + (akhir_chunk,)
+    while antrean:
+        tugas, akhir_chunk = antrean.popleft()
+        yield tugas.result() + (akhir_chunk,)
+
+def pindah_layout_lama(kota=KOTA_DEFAULT):
+    # Data lake versi satu kota (datalake/{bronze,silver,gold}) dipindah ke partisi kota default,
+    # supaya deployment lama tidak perlu full refresh
+    lama = os.path.join(BASE_DIR, 'datalake')
+    if os.path.isdir(kota.lake) or not os.path.isdir(os.path.join(lama, 'bronze')):
+        return False
+    os.makedirs(kota.lake)
+    for layer in ('bronze', 'silver', 'gold'):
+        if os.path.isdir(os.path.join(lama, layer)):
+            os.replace(os.path.join(lama, layer), os.path.join(kota.lake, layer))
+    print(f"📦 Data lake lama dipindah ke {kota.lake}")
+    return True
+
+def run_elt(full_refresh=False, chunksize=None, workers=1, kota=None):
+    """ELT satu kota (kode di kota.json) atau semua kota kalau `kota` None. Tiap kota diproses terpisah.
+
+    `workers`: jumlah proses paralel; 1 = serial, 0 = semua core (os.cpu_count()).
+    Selama ELT satu kota jalan, data lake kota tsb dikunci eksklusif (Kota.kunci_lake): build DuckDB
+    di engine (rebuild otomatis app, CLI) menunggu sampai ELT selesai, tidak membaca gold yang setengah jadi.
+    """
+    daftar = list(DAFTAR_KOTA.values()) if kota is None else [get_kota(kota)]
+    workers = workers or os.cpu_count() or 1
+    pindah_layout_lama()
+    for k in daftar:
+        with k.kunci_lake(lapor=print), span('elt.total', kota=k.kode):
+            _run_elt(k, full_refresh, chunksize, workers)
+    if os.getenv('RADAR_METRICS'):
+        print("📈 Ringkasan waktu per tahap:\n" + METRICS.ringkasan())
+
+def _run_elt(kota, full_refresh, chunksize, workers):
+    print(f"🚀 MEMULAI PROSES ELT ({kota.nama})...")
+    for folder in (kota.bronze, kota.silver, kota.gold):
+        os.makedirs(folder, exist_ok=True)
+    gold_locations, habitat_mart, osm_silver = kota.gold_locations, kota.habitat_mart, kota.osm_silver
+    manifest = {'files': {}, 'survey': {'offset': 0}} if full_refresh else load_manifest(kota.manifest)
+
+    # --- 1. EXTRACT & LOAD (hanya file yang berubah) ---
+    status = {}
+    entri = {}
+    for jenis, src in kota.raw.items():
+        f = os.path.basename(src)
+        with span('elt.load', file=f) as s:
+            dst = kota.bronze_path(jenis)
+            lama = os.path.getsize(dst) if os.path.exists(dst) else 0
+            status[jenis], entri[jenis] = sync_bronze(src, dst, manifest)
+            # Byte yang benar-benar disalin (append: hanya ekornya)
+            if status[jenis] != 'skip' and os.path.exists(dst):
+                s['bytes'] = os.path.getsize(dst) - (lama if status[jenis] == 'append' else 0)
+        if status[jenis] == 'skip':
+            print(f"⏭️ [LOAD] {f} tidak berubah.")
+        else:
+            print(f"✅ [LOAD] {f} masuk ke Bronze ({status[jenis]}).")
+
+    # --- 2. TRANSFORM (Bronze ke Gold via Unpivot, append per partisi tanggal) ---
+    # Rules & OSM dikirim ke pool duluan supaya jalan bersamaan dengan survey (workers > 1);
+    # di mode serial baru dikerjakan saat hasilnya diambil (setelah survey)
+    rules_out = kota.rules_silver
+    rules_path = kota.bronze_path('rules')
+    rules_perlu = status['rules'] != 'skip' or not os.path.exists(rules_out)
+    # Dulu di-parse di init_db app (json.load seluruh file) -> sekarang sekali di sini
+    osm_path = kota.bronze_path('osm')
+    osm_berubah = os.path.exists(osm_path) and (status['osm'] != 'skip' or not os.path.exists(osm_silver))
+
+    survey_path = kota.bronze_path('survey')
+    ok = {jenis: True for jenis in kota.raw}
+    df_gold_baru = None
+    mart_baru = []
+    survey_status = status['survey']
+    if not os.path.isdir(gold_locations) and os.path.exists(survey_path):
+        survey_status = 'full'
+
+    with buat_pool(workers) as pool:
+        tugas_rules = pool.submit(transform_rules, rules_path, rules_out) if rules_perlu else None
+        tugas_osm = pool.submit(transform_osm, osm_path, osm_silver) if osm_berubah else None
+
+        if survey_status != 'skip':
+            if survey_status == 'full':
+                # Sumber ditulis ulang (bukan append) -> gold survey dibangun ulang
+                shutil.rmtree(gold_locations, ignore_errors=True)
+                manifest['survey'] = {'offset': 0}
+            offset = manifest['survey']['offset']
+            offset_baru = offset
+            print(f"⚙️ [TRANSFORM] Memproses Data Survey (mulai byte {offset})...")
+            habitat_baru = set()
+            n_baris = 0
+            # Append: frekuensi habitat chunk baru langsung digabung ke mart lama (tanpa baca ulang gold)
+            kumpul_mart = survey_status == 'append'
+            urutan = 0
+            if kumpul_mart and os.path.exists(habitat_mart):
+                # Nomor item berikutnya = total item habitat lama (sama dengan penomoran full rebuild)
+                urutan = int(pd.read_parquet(habitat_mart, columns=['jumlah'])['jumlah'].sum())
+            with span('elt.survey') as s_survey:
+                try:
+                    # Tiap chunk langsung di-unpivot & ditulis sebagai part sendiri (part_id = byte awal chunk)
+                    for n_gold, habitat, mart, akhir in _hasil_survey(pool, workers, survey_path, offset, chunksize,
+                                                                          kumpul_mart, gold_locations):
+                        habitat_baru.update(habitat)
+                        n_baris += n_gold
+                        if mart is not None:
+                            mart['urutan'] += urutan
+                            urutan += int(mart['jumlah'].sum())
+                            mart_baru.append(mart)
+                        offset_baru = akhir
+                except Exception as e:
+                    print(f"Error reading file {survey_path}: {e}")
+                    ok['survey'] = False
+                s_survey['rows'], s_survey['bytes'] = n_baris, offset_baru - offset
+
+            if n_baris:
+                df_gold_baru = pd.DataFrame({'habitat_pilihan': sorted(habitat_baru)})
+                print(f"✅ [SUCCESS] {n_baris} baris Gold baru tersimpan di: {gold_locations}")
+            manifest['survey'] = {'offset': max(offset_baru, offset)}
+
+        # --- 2b. ENRICH: inferred_archetype di gold ---
+        # Part baru sudah diklasifikasi saat ditulis; part lama (dari versi sebelum kolom ini ada
+        # atau dengan tabel keyword lama) ditulis ulang, per file di pool
+        if os.path.isdir(gold_locations) and manifest.get('archetype_keywords') != FINGERPRINT_KEYWORD:
+            if survey_status != 'full':
+                print("⚙️ [TRANSFORM] Tabel keyword archetype berubah, klasifikasi ulang Gold...")
+                with span('elt.klasifikasi_ulang') as s:
+                    parts = sorted(os.path.join(r, f) for r, _, fs in os.walk(gold_locations)
+                                   for f in fs if f.endswith('.parquet'))
+                    s['rows'] = sum(t.result() for t in [pool.submit(klasifikasi_ulang_part, p) for p in parts])
+            manifest['archetype_keywords'] = FINGERPRINT_KEYWORD
+
+        # --- 3. Proses Social Rules (Silver) ---
+        if tugas_rules is not None:
+            ok['rules'] = tugas_rules.result()
+
+        # --- 4. OSM (Silver, streaming) ---
+        if tugas_osm is not None:
+            print("⚙️ [TRANSFORM] Streaming OSM ke Silver...")
+            try:
+                n_osm = tugas_osm.result()
+                print(f"✅ [SUCCESS] {n_osm} tempat OSM tersimpan di: {osm_silver}")
+            except Exception as e:
+                print(f"Error reading file {osm_path}: {e}")
+                osm_berubah = False
+                ok['osm'] = False
+
+    # --- 5. HABITAT -> OSM (Gold) ---
+    # Resolusi nama habitat survey ke tempat OSM dilakukan sekali di sini,
+    # runtime cukup lookup by key (bukan LIKE dua arah ke seluruh dim_gps)
+    habitat_out = kota.habitat_gps
+    if not os.path.exists(habitat_out):
+        osm_berubah = True
+    if os.path.exists(osm_silver) and os.path.isdir(gold_locations) and (osm_berubah or df_gold_baru is not None):
+        print("⚙️ [TRANSFORM] Mencocokkan habitat survey ke OSM...")
+        with span('elt.habitat_gps') as s:
+            if osm_berubah or survey_status == 'full':
+                # OSM berubah: semua habitat dicocokkan ulang
+                habitats = baca_gold(gold_locations, ['habitat_pilihan'])['habitat_pilihan']
+                df_match = build_habitat_gps(habitats, load_osm_places(osm_silver))
+            else:
+                # OSM sama: cukup habitat dari baris survey baru yang belum ter-resolve
+                df_lama = pd.read_parquet(habitat_out)
+                df_tambah = build_habitat_gps(df_gold_baru['habitat_pilihan'], load_osm_places(osm_silver),
+                                              skip_keys=set(df_lama['habitat_key']))
+                df_match = pd.concat([df_lama, df_tambah], ignore_index=True)
+            tulis_parquet(df_match, habitat_out, ['habitat_key', 'peringkat'])
+            s['rows'] = len(df_match)
+            print(f"✅ [SUCCESS] {df_match['habitat_key'].nunique()} habitat ter-resolve ke OSM.")
+
+    # --- 6. HABITAT MART (Gold) ---
+    # Frekuensi habitat per archetype & gender, supaya top-N di cari_target cukup satu query by key
+    if os.path.isdir(gold_locations):
+        with span('elt.habitat_mart') as s:
+            df_mart = None
+            if survey_status == 'full' or not os.path.exists(habitat_mart):
+                # Urutan baca (offset part, no_baris) = urutan `baris` tb_survey di engine
+                df_all = baca_gold(gold_locations, ['archetype', 'gender', 'habitat_pilihan'])
+                df_mart = gabung_habitat_mart([agregasi_habitat(df_all)])
+            elif mart_baru:
+                df_mart = gabung_habitat_mart([pd.read_parquet(habitat_mart)] + mart_baru)
+            if df_mart is not None:
+                # gabung_habitat_mart sudah mengurutkan per archetype
+                tulis_parquet(df_mart, habitat_mart)
+                s['rows'] = len(df_mart)
+                print(f"✅ [SUCCESS] {len(df_mart)} baris habitat mart tersimpan di: {habitat_mart}")
+
+    catat_manifest(manifest, kota, entri, ok)
+    save_manifest(manifest, kota.manifest)
+    print(f"🏁 ELT SELESAI ({kota.nama}).")
 
 if __name__ == "__main__":
-    run_elt()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="ELT Social Radar (Bronze -> Silver -> Gold)")
+    parser.add_argument('--full-refresh', action='store_true', help="abaikan manifest, bangun ulang semua layer")
+    parser.add_argument('--chunksize', type=int, default=None, help="proses survey per N baris (untuk export > RAM)")
+    parser.add_argument('--workers', type=int, default=1,
+                        help=f"jumlah proses paralel (0 = semua core); survey dipecah per --chunksize (default {CHUNKSIZE_PARALEL:,} baris)")
+    parser.add_argument('--kota', default=None, choices=list(DAFTAR_KOTA), help="hanya kota ini (default: semua kota)")
+    args = parser.parse_args()
+    run_elt(full_refresh=args.full_refresh, chunksize=args.chunksize, workers=args.workers,
+            kota=args.kota)
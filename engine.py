@@ -0,0 +1,923 @@
+import os
+import json
+import time
+import random
+import shutil
+import hashlib
+import argparse
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+
+import duckdb
+import numpy as np
+import pandas as pd
+import pytz
+
+from db_pool import DuckDBPool
+from metrics import METRICS, span, profil
+from geo_index import GridIndex
+from weather import WeatherProvider, OWM_ENDPOINT
+from result_cache import ResultCache
+from kota import DAFTAR_KOTA, KOTA_DEFAULT, get_kota, kunci_file
+
+# ==========================================
+# ENGINE REKOMENDASI (TANPA STREAMLIT)
+# ==========================================
+# Semua logika backend app.py ada di sini supaya bisa di-import / dijalankan headless
+# (batch offline, benchmark). app.py tinggal UI yang memanggil RadarEngine.
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+# Data per kota (survey, rules, OSM, timezone, DB) ada di kota.json / kota.py.
+# Konstanta di bawah = kota default, untuk pemakaian satu kota (CLI, benchmark)
+KOTA = KOTA_DEFAULT.nama
+DB_FILE = KOTA_DEFAULT.db_file
+PUSAT_KOTA = KOTA_DEFAULT.pusat
+TIMEZONE = KOTA_DEFAULT.timezone
+
+PATH_GOLD = KOTA_DEFAULT.gold_locations
+PATH_RULES = KOTA_DEFAULT.rules_silver
+PATH_OSM = KOTA_DEFAULT.osm_silver
+PATH_HABITAT_GPS = KOTA_DEFAULT.habitat_gps
+PATH_HABITAT_MART = KOTA_DEFAULT.habitat_mart
+
+HARI = ['senin', 'selasa', 'rabu', 'kamis', 'jumat', 'sabtu', 'minggu']
+
+# Mapping archetype -> kategori OSM untuk backup lokasi
+CAT_MAP = {
+    'Intellectual': ['library', 'book_shop', 'university', 'college'],
+    'Social': ['cafe', 'restaurant', 'fast_food', 'mall', 'clothing'],
+    'Sporty': ['gym', 'park', 'pitch', 'stadium'],
+    'Creative': ['arts_centre', 'gallery', 'cafe', 'museum'],
+    'Active': ['university', 'office', 'park'],
+    'Professional/Active': ['office', 'bank', 'cafe']
+}
+CAT_DEFAULT = ['cafe', 'restaurant']
+
+
+# ==========================================
+# 1. BUILD DATABASE DARI GOLD & SILVER
+# ==========================================
+# Tiap tabel dasar punya satu sumber di data lake. Fingerprint sumber (ukuran + mtime file,
+# atau semua file parquet di folder) disimpan di tabel _meta_sumber, jadi startup cukup
+# membandingkan fingerprint dan hanya membangun ulang tabel yang sumbernya berubah.
+# Naikkan SKEMA_VERSI kalau definisi tabel berubah supaya DB lama dibangun ulang.
+# Tiap kota punya file DB sendiri; `sumber` = Kota.sumber (tabel -> path di data lake kota tsb).
+# Build memegang lock bersama data lake kota (Kota.kunci_lake), ELT memegang lock eksklusif:
+# DB tidak pernah dibangun dari gold/silver yang sedang ditulis ulang.
+SKEMA_VERSI = 4
+META_TABEL = '_meta_sumber'
+SUMBER = KOTA_DEFAULT.sumber
+_SINKRON_LOCK = threading.Lock()
+
+def fingerprint_sumber(path):
+    if os.path.isdir(path):
+        isi = []
+        for root, _, files in os.walk(path):
+            for f in files:
+                if f.endswith('.parquet'):
+                    st_file = os.stat(os.path.join(root, f))
+                    isi.append((os.path.relpath(os.path.join(root, f), path), st_file.st_size, st_file.st_mtime_ns))
+        isi.sort()
+    elif os.path.exists(path):
+        st_file = os.stat(path)
+        isi = [st_file.st_size, st_file.st_mtime_ns]
+    else:
+        isi = None
+    return hashlib.sha1(json.dumps([SKEMA_VERSI, isi]).encode()).hexdigest()
+
+def baca_meta(con):
+    try:
+        return dict(con.execute(f"SELECT tabel, fingerprint FROM {META_TABEL}").fetchall())
+    except duckdb.CatalogException:
+        return {}
+
+def tabel_basi(meta, sumber=SUMBER):
+    # Tabel dasar yang fingerprint sumbernya beda dengan yang tercatat di DB
+    return [tabel for tabel, path in sumber.items() if meta.get(tabel) != fingerprint_sumber(path)]
+
+def cek_db(db_file=DB_FILE, sumber=SUMBER):
+    # Dibandingkan dengan versi DB yang sedang aktif
+    path = path_aktif(db_file)
+    if path is None:
+        return list(sumber)
+    con = duckdb.connect(path, read_only=True)
+    try:
+        return tabel_basi(baca_meta(con), sumber)
+    finally:
+        con.close()
+
+@contextmanager
+def _langkah(con, tabel):
+    # Span + profil DuckDB per tabel yang dibangun; jumlah baris dicatat sesudahnya
+    with span(f'init_db.{tabel}') as s:
+        with profil(con, f'init_db.{tabel}'):
+            yield
+        s['rows'] = con.execute(f"SELECT count(*) FROM {tabel}").fetchone()[0]
+
+def _kolom(con, relasi):
+    return [baris[0] for baris in con.execute(f"DESCRIBE {relasi}").fetchall()]
+
+def _jadikan_enum(con, tabel, kolom):
+    # Kolom teks low-cardinality -> ENUM (kode integer kecil: hemat memori, filter & group by lebih cepat).
+    # Nilai ENUM diambil dari isi tabel saat build; tiap build membuat tabel baru, jadi tidak perlu CREATE TYPE
+    ada = _kolom(con, tabel)
+    for k in kolom:
+        if k not in ada:
+            continue
+        nilai = [v for (v,) in con.execute(f"SELECT DISTINCT {k} FROM {tabel} WHERE {k} IS NOT NULL ORDER BY 1").fetchall()]
+        if nilai:
+            daftar = ', '.join("'" + str(v).replace("'", "''") + "'" for v in nilai)
+            con.execute(f"ALTER TABLE {tabel} ALTER {k} TYPE ENUM({daftar})")
+
+# --- A. LOAD DARI GOLD & SILVER LAYER (PARQUET) ---
+def _bangun_tb_survey(con, path, lapor):
+    # Gold survey dipartisi per tanggal survey (datalake/kota=<kode>/gold/locations/tanggal=YYYY-MM-DD/*.parquet),
+    # jadi kolom hive `kota` & `tanggal` ikut terbaca;
+    # union_by_name: part lama yang belum punya kolom baru (mis. inferred_archetype) tetap terbaca.
+    # Tabel disimpan terurut per archetype/gender (zone map per row group jadi selektif); urutan baris export
+    # (tie-break skor) disimpan di kolom `baris`: offset byte part (nama file), lalu no_baris. Bukan urutan path,
+    # karena satu part bisa tersebar ke beberapa partisi tanggal (part lama tanpa no_baris: urutan di file)
+    sumber = f"""read_parquet('{path}/*/*.parquet', hive_partitioning = true, hive_types_autocast = false,
+                                   union_by_name = true, filename = true, file_row_number = true)"""
+    part = "CAST(regexp_extract(filename, 'part-([0-9]+)', 1) AS BIGINT)"
+    if 'no_baris' in _kolom(con, f"SELECT * FROM {sumber}"):
+        urut, buang = f'{part}, no_baris, filename, file_row_number', 'filename, file_row_number, no_baris'
+    else:
+        urut, buang = f'{part}, filename, file_row_number', 'filename, file_row_number'
+    con.execute(f"""
+        CREATE OR REPLACE TABLE tb_survey AS
+        SELECT * EXCLUDE ({buang}), row_number() OVER (ORDER BY {urut}) - 1 AS baris
+        FROM {sumber}
+        ORDER BY archetype, gender, baris
+    """)
+    _jadikan_enum(con, 'tb_survey', ['archetype', 'gender', 'inferred_archetype'])
+
+def _bangun_tb_rules(con, path, lapor):
+    con.execute(f"CREATE OR REPLACE TABLE tb_rules AS SELECT * FROM read_parquet('{path}')")
+
+# --- C. LOAD DATA OSM (Silver, hasil streaming parser di elt_pipeline) ---
+def _bangun_dim_gps(con, path, lapor):
+    if os.path.exists(path):
+        # Silver OSM sudah terurut per kategori -> zone map kategori di DuckDB ikut rapat
+        con.execute(f"CREATE OR REPLACE TABLE dim_gps AS SELECT nama_tempat, lat, lon, kategori FROM read_parquet('{path}')")
+        _jadikan_enum(con, 'dim_gps', ['kategori'])
+    else:
+        lapor("⚠️ File 'osm_places.parquet' belum ada (jalankan elt_pipeline.py). Menggunakan mode minimal.")
+        con.execute("CREATE OR REPLACE TABLE dim_gps (nama_tempat VARCHAR, lat DOUBLE, lon DOUBLE, kategori VARCHAR)")
+
+# --- C2. HABITAT -> OSM (hasil resolusi ELT) ---
+def _bangun_habitat_gps(con, path, lapor):
+    if os.path.exists(path):
+        con.execute(f"CREATE OR REPLACE TABLE habitat_gps AS SELECT * FROM read_parquet('{path}') ORDER BY habitat_key, peringkat")
+        _jadikan_enum(con, 'habitat_gps', ['kategori', 'metode'])
+    else:
+        con.execute("""
+            CREATE OR REPLACE TABLE habitat_gps (
+                habitat VARCHAR, habitat_key VARCHAR, nama_tempat VARCHAR, lat DOUBLE, lon DOUBLE,
+                kategori VARCHAR, skor DOUBLE, metode VARCHAR, peringkat BIGINT
+            )
+        """)
+
+# --- C3. HABITAT MART (frekuensi habitat per archetype & gender, hasil ELT) ---
+def _bangun_habitat_mart(con, path, lapor):
+    if os.path.exists(path):
+        con.execute(f"CREATE OR REPLACE TABLE habitat_mart AS SELECT * FROM read_parquet('{path}') ORDER BY archetype, lokasi_key")
+    else:
+        lapor("⚠️ File 'habitat_mart.parquet' belum ada (jalankan elt_pipeline.py). Rekomendasi lokasi kosong.")
+        con.execute("""
+            CREATE OR REPLACE TABLE habitat_mart (
+                archetype VARCHAR, gender VARCHAR, lokasi_key VARCHAR, lokasi VARCHAR, jumlah BIGINT, urutan BIGINT
+            )
+        """)
+    _jadikan_enum(con, 'habitat_mart', ['archetype', 'gender'])
+    con.execute("CREATE INDEX idx_habitat_mart_archetype ON habitat_mart (archetype)")
+
+BANGUN = {
+    'tb_survey': _bangun_tb_survey,
+    'tb_rules': _bangun_tb_rules,
+    'dim_gps': _bangun_dim_gps,
+    'habitat_gps': _bangun_habitat_gps,
+    'habitat_mart': _bangun_habitat_mart,
+}
+
+def _bangun_view(con):
+    con.execute("CREATE OR REPLACE VIEW v_time_rules AS SELECT * FROM tb_rules")
+
+    # --- B. VIEW MAPPING (Gunakan nama kolom baru dari Silver/Gold) ---
+    # Di elt_pipeline, kita sudah me-rename 'intel_fisik_cowo' menjadi 'ciri_fisik'
+    con.execute("""
+    CREATE OR REPLACE VIEW v_trait_mapping AS
+    SELECT archetype, ciri_fisik as traits
+    FROM tb_survey
+    WHERE ciri_fisik IS NOT NULL
+    """)
+
+    con.execute("""
+    CREATE OR REPLACE VIEW v_female_locations AS
+    SELECT archetype, habitat_pilihan as lokasi
+    FROM tb_survey
+    WHERE gender = 'Perempuan' AND habitat_pilihan IS NOT NULL
+    """)
+
+    # --- D. VIEW TRAITS ---
+    con.execute("""
+        CREATE OR REPLACE VIEW v_dim_traits AS
+        SELECT DISTINCT unnest(str_split(ciri_fisik, ', ')) as nilai
+        FROM tb_survey WHERE ciri_fisik IS NOT NULL
+    """)
+
+def _bangun_turunan_survey(con):
+    # --- D2. OPSI DROPDOWN (disimpan, bukan DISTINCT unnest tiap rerun) ---
+    with _langkah(con, 'opsi_traits'):
+        con.execute("""
+            CREATE OR REPLACE TABLE opsi_traits AS
+            SELECT nilai FROM v_dim_traits
+            WHERE nilai IS NOT NULL AND length(nilai) > 2
+            ORDER BY nilai
+        """)
+
+    # --- E. INVERTED INDEX TRAIT -> ARCHETYPE ---
+    # Dihitung sekali saat init, supaya cari_target tidak perlu iterrows() tiap SCAN.
+    # bobot = jumlah baris survey archetype tsb yang traits-nya mengandung token (substring, sama dgn logika lama)
+    # baris_pertama = `baris` (urutan survey) pertama yang cocok, dipakai untuk menjaga urutan tie-break max()
+    with _langkah(con, 'idx_trait_archetype'):
+        con.execute("""
+            CREATE OR REPLACE TABLE idx_trait_archetype AS
+            WITH vocab AS (
+                SELECT DISTINCT lower(trim(nilai)) AS token
+                FROM v_dim_traits WHERE trim(nilai) <> ''
+            ),
+            mapping AS (
+                SELECT baris, archetype, lower(ciri_fisik) AS traits
+                FROM tb_survey WHERE ciri_fisik IS NOT NULL
+            )
+            SELECT v.token, m.archetype, count(*) AS bobot, min(m.baris) AS baris_pertama
+            FROM vocab v JOIN mapping m ON contains(m.traits, v.token)
+            GROUP BY v.token, m.archetype
+        """)
+
+# --- VERSI DB (BLUE/GREEN) ---
+# Build tidak pernah menulis ke file yang sedang dibaca: tiap build menghasilkan file versi baru
+# di folder db/, lalu pointer db/<nama>.current diganti atomik (os.replace). Reader yang masih
+# memegang versi lama tetap jalan sampai koneksinya ditutup; versi lama dibersihkan gc_versi.
+# Kalau pointer belum ada, DB_FILE (hasil build lama / artefak repo) dipakai sebagai versi awal.
+SIMPAN_VERSI = 2  # versi lama yang tetap disimpan selain versi aktif
+
+def _dir_versi(db_file):
+    return os.path.join(os.path.dirname(os.path.abspath(db_file)), 'db')
+
+def _pointer(db_file):
+    return os.path.join(_dir_versi(db_file), os.path.basename(db_file) + '.current')
+
+def _stem(db_file):
+    return os.path.splitext(os.path.basename(db_file))[0]
+
+def path_aktif(db_file=DB_FILE):
+    """Path file versi DB yang sedang aktif, None kalau belum ada DB sama sekali."""
+    try:
+        with open(_pointer(db_file), encoding='utf-8') as f:
+            path = os.path.join(_dir_versi(db_file), f.read().strip())
+        if os.path.exists(path):
+            return path
+    except FileNotFoundError:
+        pass
+    return db_file if os.path.exists(db_file) else None
+
+def _tulis_pointer(db_file, path):
+    tmp = f"{_pointer(db_file)}.{os.getpid()}.tmp"
+    with open(tmp, 'w', encoding='utf-8') as f:
+        f.write(os.path.basename(path))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, _pointer(db_file))
+
+def _path_versi_baru(db_file):
+    _path_versi_baru.n += 1
+    versi = f"{time.strftime('%Y%m%d%H%M%S')}-{os.getpid()}-{_path_versi_baru.n}"
+    return os.path.join(_dir_versi(db_file), f"{_stem(db_file)}-{versi}.duckdb")
+_path_versi_baru.n = 0
+
+def gc_versi(db_file=DB_FILE, simpan=SIMPAN_VERSI, umur_tmp=3600):
+    """Hapus file versi lama (selain versi aktif + `simpan` versi terbaru) dan sisa build yang gagal."""
+    folder = _dir_versi(db_file)
+    if not os.path.isdir(folder):
+        return []
+    aktif = path_aktif(db_file)
+    prefix = _stem(db_file) + '-'
+    versi = []
+    for f in os.listdir(folder):
+        path = os.path.join(folder, f)
+        if not f.startswith(prefix) or path == aktif:
+            continue
+        if f.endswith('.duckdb'):
+            versi.append(path)
+        elif f.endswith('.tmp') and time.time() - os.path.getmtime(path) > umur_tmp:
+            versi.append(path)
+    versi.sort(key=os.path.getmtime, reverse=True)
+    dihapus = []
+    for path in [p for p in versi if p.endswith('.duckdb')][simpan:] + [p for p in versi if p.endswith('.tmp')]:
+        try:
+            # Di Linux file yang masih dibuka reader tetap bisa dibaca sampai koneksinya ditutup;
+            # di Windows penghapusan gagal dan dicoba lagi di GC berikutnya
+            os.remove(path)
+            dihapus.append(path)
+        except OSError:
+            pass
+    return dihapus
+
+def _kunci_file(db_file):
+    # Serialisasi build DB antar proses (mis. beberapa proses Streamlit + CLI engine); di OS tanpa fcntl
+    # cukup _SINKRON_LOCK. Hanya builder DB yang memakai lock ini: ELT tidak menyentuh DB, dan ELT vs
+    # build dijaga lock data lake (Kota.kunci_lake) yang juga diambil sinkron_db
+    os.makedirs(_dir_versi(db_file), exist_ok=True)
+    return kunci_file(os.path.join(_dir_versi(db_file), '.lock'))
+
+def _sinkron_file(path, basi, lapor, sumber=SUMBER):
+    con = duckdb.connect(path)
+    try:
+        # DB tanpa meta (dibuat versi lama) -> semua tabel dianggap basi
+        if not baca_meta(con):
+            basi = list(sumber)
+        con.execute(f"CREATE TABLE IF NOT EXISTS {META_TABEL} (tabel VARCHAR PRIMARY KEY, fingerprint VARCHAR, dibangun TIMESTAMP)")
+        for tabel in sumber:
+            if tabel not in basi:
+                continue
+            # Fingerprint diambil sebelum build: kalau sumber berubah lagi di tengah jalan, cek berikutnya tetap mendeteksi
+            fp = fingerprint_sumber(sumber[tabel])
+            with _langkah(con, tabel):
+                BANGUN[tabel](con, sumber[tabel], lapor)
+            con.execute(f"INSERT OR REPLACE INTO {META_TABEL} VALUES (?, ?, now())", [tabel, fp])
+        _bangun_view(con)
+        if 'tb_survey' in basi:
+            _bangun_turunan_survey(con)
+        con.execute("CHECKPOINT")
+    finally:
+        con.close()
+    return basi
+
+def sinkron_db(db_file=DB_FILE, lapor=print, paksa=False, sumber=SUMBER, kota=None):
+    """Bangun versi DB baru kalau ada sumber yang berubah (semua tabel kalau `paksa`), lalu swap pointer.
+
+    Tabel yang sumbernya sama disalin dari versi aktif. Return daftar tabel yang dibangun ulang.
+    Kalau ELT `kota` (pemilik `sumber`) sedang jalan, build menunggu sampai ELT selesai.
+    """
+    with get_kota(kota).kunci_lake(bersama=True, lapor=lapor), _SINKRON_LOCK, _kunci_file(db_file), \
+            span('init_db.total') as s:
+        aktif = path_aktif(db_file)
+        basi = list(sumber) if paksa or aktif is None else cek_db(db_file, sumber)
+        if not basi:
+            return []
+
+        baru = _path_versi_baru(db_file)
+        tmp = baru + '.tmp'
+        try:
+            if aktif is not None and not paksa:
+                shutil.copyfile(aktif, tmp)
+            basi = _sinkron_file(tmp, basi, lapor, sumber)
+            os.replace(tmp, baru)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+        _tulis_pointer(db_file, baru)
+        gc_versi(db_file)
+        s['rows'] = len(basi)
+        return basi
+
+def init_db(db_file=DB_FILE, lapor=print, sumber=SUMBER, kota=None):
+    # Bangun ulang semua tabel (DB baru / benchmark cold build)
+    return sinkron_db(db_file, lapor, paksa=True, sumber=sumber, kota=kota)
+
+def sinkron_kota(kota=None, lapor=print, paksa=False):
+    # DB satu kota dari data lake kota tsb
+    kota = get_kota(kota)
+    return sinkron_db(kota.db_file, lapor, paksa=paksa, sumber=kota.sumber, kota=kota)
+
+
+# ==========================================
+# 2. HELPER MURNI (TANPA STATE)
+# ==========================================
+def _index_token_baru(df_rows, tokens):
+    # Hitung entri index on-the-fly untuk token yang tidak ada di idx_trait_archetype
+    parts = []
+    for token in tokens:
+        hit = df_rows[df_rows['traits'].str.contains(token, regex=False)]
+        if hit.empty: continue
+        agg = hit.groupby('archetype').agg(bobot=('baris', 'size'), baris_pertama=('baris', 'min')).reset_index()
+        agg['token'] = token
+        parts.append(agg)
+    if not parts:
+        return pd.DataFrame(columns=['token', 'archetype', 'bobot', 'baris_pertama'])
+    return pd.concat(parts, ignore_index=True)
+
+def compile_time_lookup(df_rules):
+    # Tabel padat [hari x menit] -> index rule (atau -1), dihitung sekali per versi rules.
+    # Logika match sama dengan versi lama: cur_hour = jam + menit/60, start <= cur_hour <= end,
+    # rule yang lewat tengah malam (start > end) cocok di kedua sisi, rule pertama yang cocok menang.
+    tabel = np.full((7, 24 * 60), -1, dtype=np.int32)
+    rules = list(zip(df_rules['day_category'].astype(str).str.strip().str.lower(),
+                     df_rules['start_hour'].astype(float), df_rules['end_hour'].astype(float)))
+    for d, nama_hari in enumerate(HARI):
+        rules_hari = [(pos, start, end) for pos, (hari, start, end) in enumerate(rules) if hari == nama_hari]
+        for menit in range(24 * 60):
+            cur_hour = menit // 60 + (menit % 60) / 60
+            for pos, start, end in rules_hari:
+                if (start <= cur_hour <= end) if start <= end else (cur_hour >= start or cur_hour <= end):
+                    tabel[d, menit] = pos
+                    break
+    baris = [df_rules.iloc[pos] for pos in range(len(df_rules))]
+    return tabel, baris
+
+def _fingerprint(path):
+    st_file = os.stat(path)
+    return (path, st_file.st_mtime_ns, st_file.st_size)
+
+
+# ==========================================
+# 3. ENGINE (STATE PER PROSES)
+# ==========================================
+class RadarEngine:
+    def __init__(self, db_file=None, api_key=None, weather_endpoint=OWM_ENDPOINT, weather_ttl=600, weather=None,
+                 cache_size=1024, cache_ttl=600, kota=None):
+        # Satu engine = satu kota (shard); tanpa db_file dipakai DB kota tsb
+        self.kota = get_kota(kota)
+        db_file = db_file or self.kota.db_file
+        self.db_file = db_file
+        # Engine terikat ke satu versi DB (yang aktif saat dibuat)
+        self.db_path = path_aktif(db_file)
+        if self.db_path is None:
+            raise FileNotFoundError(f"Database {db_file} belum dibangun (jalankan init_db)")
+        self.versi = os.path.basename(self.db_path)
+        self.pool = DuckDBPool(self.db_path)
+        # Hasil cari_target per (ciri, fase waktu, versi DB); engine baru (rebuild) = cache baru
+        self.cache = ResultCache(cache_size, cache_ttl)
+        self.tz = pytz.timezone(self.kota.timezone)
+        self._lock = threading.Lock()
+        self._trait_index = None
+        self._gps_index = None
+        self._time_lookup = (None, None)
+        self._opsi = None
+        # Fingerprint sumber saat DB ini dibangun, untuk cek basi tanpa membuka koneksi baru
+        with self.pool.pinjam() as con:
+            self.meta = baca_meta(con)
+        self._cek = (0.0, [])
+        # Cuaca hanya dipakai UI; batch offline tidak perlu API key.
+        # Provider bisa dititipkan (EngineAktif) supaya cache cuaca tidak hilang saat ganti versi DB
+        self._weather_sendiri = weather is None
+        self.weather = weather if weather is not None else (
+            WeatherProvider(self.kota.nama, api_key, endpoint=weather_endpoint, ttl=weather_ttl) if api_key else None)
+
+    def close(self):
+        if self.weather is not None and self._weather_sendiri:
+            self.weather.stop()
+        self.cache.clear()
+        self.pool.close()
+
+    # --- state yang dimuat sekali (lazy) ---
+    def trait_index(self):
+        if self._trait_index is None:
+            with self._lock:
+                if self._trait_index is None:
+                    with self.pool.pinjam() as con:
+                        # archetype ENUM dibaca sebagai teks biasa (bukan Categorical) untuk merge/groupby pandas
+                        df_idx = con.execute("SELECT token, archetype::VARCHAR AS archetype, bobot, baris_pertama FROM idx_trait_archetype").df()
+                        # Baris mentah tetap disimpan untuk token di luar kosakata dropdown (fallback substring)
+                        df_rows = con.execute("""
+                            SELECT baris, archetype::VARCHAR AS archetype, lower(ciri_fisik) AS traits
+                            FROM tb_survey WHERE ciri_fisik IS NOT NULL ORDER BY baris
+                        """).df()
+                    self._trait_index = (df_idx, df_rows)
+        return self._trait_index
+
+    def gps_index(self):
+        if self._gps_index is None:
+            with self._lock:
+                if self._gps_index is None:
+                    # Grid index dim_gps per kategori
+                    with self.pool.pinjam() as con:
+                        df_gps = con.execute("SELECT nama_tempat, lat, lon, kategori::VARCHAR AS kategori FROM dim_gps").df()
+                    self._gps_index = GridIndex(df_gps)
+        return self._gps_index
+
+    def time_lookup(self):
+        # Cache per versi rules_data.parquet: kalau ELT menulis ulang file, fingerprint berubah -> compile ulang
+        path = self.kota.sumber['tb_rules']
+        fingerprint = _fingerprint(path)
+        fp_lama, lookup = self._time_lookup
+        if fp_lama != fingerprint:
+            lookup = compile_time_lookup(pd.read_parquet(path))
+            self._time_lookup = (fingerprint, lookup)
+        return lookup
+
+    # --- query ---
+    def tabel_basi(self, interval=5.0):
+        # Dicek maksimal sekali per `interval` detik (stat file data lake, tanpa query DB)
+        waktu, basi = self._cek
+        if time.monotonic() - waktu >= interval:
+            basi = tabel_basi(self.meta, self.kota.sumber)
+            self._cek = (time.monotonic(), basi)
+        return basi
+
+    def tabel_belum_ada(self):
+        # Tabel yang belum pernah dibangun di versi ini (DB dari versi kode lama); query ke sana pasti gagal
+        return [tabel for tabel in self.kota.sumber if tabel not in self.meta]
+
+    def opsi_traits(self):
+        # Sudah dibersihkan & diurutkan saat build (tabel opsi_traits), cukup dibaca sekali per engine
+        if self._opsi is None:
+            self._opsi = [x for (x,) in self.pool.fetchall('opsi_traits')]
+        return self._opsi
+
+    def cari_terdekat(self, lat, lon, kategori=None, k=5):
+        # k tempat terdekat dari titik referensi (opsional filter kategori)
+        return self.gps_index().nearest(lat, lon, k=k, kategori=kategori)
+
+    def hitung_skor_batch(self, daftar_ciri):
+        """Skor archetype untuk banyak set ciri sekaligus. Hasil per set = dict sama seperti logika iterrows lama."""
+        df_idx, df_rows = self.trait_index()
+        hasil = [{} for _ in daftar_ciri]
+
+        df_q = pd.DataFrame(
+            [(qid, x.lower().strip()) for qid, ciri in enumerate(daftar_ciri) for x in ciri],
+            columns=['qid', 'token']
+        )
+        if df_q.empty: return hasil
+
+        baru = set(df_q['token']) - set(df_idx['token'])
+        if baru:
+            df_idx = pd.concat([df_idx, _index_token_baru(df_rows, sorted(baru))], ignore_index=True)
+
+        # Lookup + sum (token duplikat di input tetap dihitung ganda, sama seperti sebelumnya)
+        df_m = df_q.merge(df_idx, on='token')
+        if df_m.empty: return hasil
+        df_agg = (df_m.groupby(['qid', 'archetype'])
+                      .agg(skor=('bobot', 'sum'), urut=('baris_pertama', 'min'))
+                      .reset_index()
+                      .sort_values(['qid', 'urut']))
+
+        for qid, arch, skor in zip(df_agg['qid'], df_agg['archetype'], df_agg['skor']):
+            hasil[qid][arch] = int(skor)
+        return hasil
+
+    def hitung_skor(self, ciri_input):
+        return self.hitung_skor_batch([ciri_input])[0]
+
+    def get_cuaca(self):
+        # Hanya baca cache di memori, render tidak pernah menunggu OpenWeatherMap
+        with span('query.cuaca'):
+            if self.weather is None:
+                return "Unknown", "Offline", 30
+            return self.weather.start().get()
+
+    def get_time_context(self, now=None):
+        with span('query.time_context'):
+            try:
+                tabel, baris = self.time_lookup()
+                now_wita = now or datetime.now(self.tz)
+                pos = tabel[now_wita.weekday(), now_wita.hour * 60 + now_wita.minute]
+                return baris[pos] if pos >= 0 else None
+            except Exception as e:
+                return None
+
+    def top_habitat(self, archetype, prioritas='', n=3):
+        """[(lokasi, jumlah)] terbanyak untuk archetype, diprioritaskan yang cocok dengan rekomendasi waktu."""
+        aturan = [x.strip().lower() for x in str(prioritas).split(',')] if prioritas else []
+        return self.pool.fetchall('habitat_top', archetype, aturan, n)
+
+    def gps_habitat(self, habitat):
+        # (nama_tempat, lat, lon, kategori) peringkat 1 hasil ELT, None kalau tidak ada
+        return self.pool.fetchone('habitat_gps', habitat.lower())
+
+    def kunci_cache(self, ciri_input, context_waktu=None, titik_referensi=None):
+        # Ciri dinormalisasi seperti di hitung_skor (urutan input tidak mengubah skor; duplikat tetap dihitung)
+        ciri = tuple(sorted(x.lower().strip() for x in ciri_input))
+        fase = None
+        if context_waktu is not None:
+            fase = (str(context_waktu['phase_name']), str(context_waktu['rekomendasi_prioritas']))
+        titik = tuple(titik_referensi) if titik_referensi is not None else None
+        return ciri, fase, titik, self.versi
+
+    def cari_target(self, ciri_input, context_waktu=None, titik_referensi=None, rng=None):
+        """Rekomendasi satu scan (DataFrame 1 baris, kosong kalau tidak cocok).
+
+        Tanpa `rng`, pilihan acak di-seed dari kunci cache, jadi scan yang sama (ciri, fase, versi DB)
+        selalu memberi hasil yang sama dan bisa dilayani dari cache. Dengan `rng`, cache dilewati.
+        """
+        if rng is not None:
+            hasil = self._cari_target(ciri_input, context_waktu, titik_referensi, rng)
+            return pd.DataFrame([hasil]) if hasil else pd.DataFrame()
+
+        kunci = self.kunci_cache(ciri_input, context_waktu, titik_referensi)
+        ada, hasil = self.cache.get(kunci)
+        METRICS.hitung('cari_target.cache_hit' if ada else 'cari_target.cache_miss')
+        if not ada:
+            seed = int(hashlib.sha1(repr(kunci).encode()).hexdigest()[:16], 16)
+            hasil = self._cari_target(ciri_input, context_waktu, titik_referensi, random.Random(seed))
+            self.cache.put(kunci, hasil)
+        if not hasil:
+            return pd.DataFrame()
+        # "Match" mengikuti input request ini (urutan bisa beda dengan yang mengisi cache)
+        return pd.DataFrame([dict(hasil, Match=ciri_input)])
+
+    def _cari_target(self, ciri_input, context_waktu, titik_referensi, rng):
+        with span('cari_target.total'):
+            # 1. IDENTIFIKASI ARCHETYPE (Lookup ke inverted index, bukan scan v_trait_mapping)
+            with span('cari_target.skor') as s:
+                scores = self.hitung_skor(ciri_input)
+                s['rows'] = len(ciri_input)
+            return self._rekomendasi(ciri_input, scores, context_waktu, titik_referensi, rng, {}, {})
+
+    def _rekomendasi(self, ciri_input, scores, context_waktu, titik_referensi, rng, cache_lokasi, cache_gps):
+        if not scores: return None
+        best_archetype = max(scores, key=scores.get)
+
+        # 2. CARI LOKASI PEREMPUAN + FILTER WAKTU (satu query ke habitat_mart, di-cache selama satu batch)
+        with span('cari_target.habitat') as s:
+            prioritas = context_waktu['rekomendasi_prioritas'] if context_waktu is not None else ''
+            kunci = (best_archetype, prioritas)
+            if kunci not in cache_lokasi:
+                cache_lokasi[kunci] = self.top_habitat(best_archetype, prioritas)
+            counts = cache_lokasi[kunci]        # Lokasi Generik dari Survey (Contoh: "Art Gallery")
+            s['rows'] = len(counts)
+
+        if not counts: return None
+
+        most_common_loc = rng.choice(counts)[0]
+        # 3. MAPPING KE KOORDINAT OSM
+        relevant_cats = CAT_MAP.get(best_archetype, CAT_DEFAULT)
+
+        # Lookup by key ke tabel hasil ELT (bukan LIKE dua arah ke seluruh dim_gps)
+        with span('cari_target.gps_lookup'):
+            if most_common_loc not in cache_gps:
+                cache_gps[most_common_loc] = self.gps_habitat(most_common_loc)
+            row_gps = cache_gps[most_common_loc]
+
+        # --- PERBAIKAN DI SINI ---
+        display_name = most_common_loc # Default awal
+
+        if row_gps is not None:
+            # SKENARIO 1: Ketemu Nama Persis
+            final_loc_name, lat, lon = row_gps[0], row_gps[1], row_gps[2]
+            display_name = final_loc_name # Update display jadi nama spesifik
+        else:
+            # SKENARIO 2: Nama Gak Ketemu, Cari Backup Kategori
+            # Lewat grid index: terdekat dari titik referensi kalau ada, kalau tidak pick acak O(1)
+            with span('cari_target.gps_backup'):
+                gps_index = self.gps_index()
+                if titik_referensi is not None:
+                    terdekat = gps_index.nearest(titik_referensi[0], titik_referensi[1], k=1, kategori=relevant_cats)
+                    backup = terdekat[0] if terdekat else None
+                else:
+                    backup = gps_index.pilih_acak(relevant_cats, rng=rng)
+
+            if backup is not None:
+                lat, lon = backup['lat'], backup['lon']
+                real_osm_name = backup['nama_tempat']
+
+                # Judul Besar: "Starbucks (Rekomendasi Creative)"
+                final_loc_name = f"{real_osm_name} (Rekomendasi {best_archetype})"
+
+                # Lokasi Kecil: "Starbucks" (Bukan "Art Gallery" lagi)
+                display_name = real_osm_name
+            else:
+                # SKENARIO 3: Nyerah (Pusat Kota)
+                lat, lon = self.kota.pusat
+                final_loc_name = f"{most_common_loc} (Area Umum)"
+                display_name = most_common_loc
+
+        # 4. SUSUN HASIL
+        return {
+            "Profil": f"Tipe {best_archetype}",
+            "Skor": scores[best_archetype],
+            "Lokasi_Nama": final_loc_name,   # Judul Besar
+            "Lokasi_Full": display_name,     # FIX: Menampilkan nama tempat spesifik
+            "lat": lat,
+            "lon": lon,
+            "Match": ciri_input
+        }
+
+    def cari_target_batch(self, daftar_ciri, daftar_waktu=None, titik_referensi=None, rng=random):
+        """Banyak request sekaligus: skor dihitung dalam satu lookup, lokasi per archetype di-cache.
+
+        `daftar_waktu` = datetime per request (None = sekarang). Hasil: list dict (kosong kalau tidak cocok).
+        """
+        with span('cari_target.skor_batch') as s:
+            semua_skor = self.hitung_skor_batch(daftar_ciri)
+            s['rows'] = len(daftar_ciri)
+        cache_lokasi, cache_gps = {}, {}
+        hasil = []
+        for i, (ciri, scores) in enumerate(zip(daftar_ciri, semua_skor)):
+            waktu = daftar_waktu[i] if daftar_waktu is not None else None
+            ctx = self.get_time_context(now=waktu)
+            row = self._rekomendasi(ciri, scores, ctx, titik_referensi, rng, cache_lokasi, cache_gps) or {}
+            row['Fase'] = ctx['phase_name'] if ctx is not None else None
+            hasil.append(row)
+        return hasil
+
+
+class EngineAktif:
+    """Engine untuk versi DB yang sedang aktif (blue/green).
+
+    Pointer versi dicek tiap `interval` detik; kalau pindah, request berikutnya memakai engine baru,
+    sedangkan engine lama baru ditutup setelah `tenggang` detik supaya query yang sedang jalan selesai.
+    """
+
+    def __init__(self, db_file=None, api_key=None, weather_endpoint=OWM_ENDPOINT, weather_ttl=600,
+                 interval=5.0, tenggang=60.0, jeda_gagal=60.0, cache_size=1024, cache_ttl=600, kota=None):
+        self.kota = get_kota(kota)
+        self.db_file = db_file or self.kota.db_file
+        self.cache_size = cache_size
+        self.cache_ttl = cache_ttl
+        self.interval = interval
+        self.tenggang = tenggang
+        self.jeda_gagal = jeda_gagal
+        self.weather = WeatherProvider(self.kota.nama, api_key, endpoint=weather_endpoint, ttl=weather_ttl) if api_key else None
+        self._lock = threading.Lock()
+        self._engine = None
+        self._lama = []  # (waktu diganti, engine)
+        self._cek = 0.0
+        self._rebuild = None
+        self.status_rebuild = None  # (waktu, 'ok'/'gagal', tabel/pesan)
+
+    def ada_db(self):
+        return path_aktif(self.db_file) is not None
+
+    def segarkan(self):
+        # Pointer versi langsung dicek di get() berikutnya (mis. setelah build blocking)
+        self._cek = 0.0
+
+    def get(self):
+        sekarang = time.monotonic()
+        if self._engine is not None and sekarang - self._cek < self.interval:
+            return self._engine
+        with self._lock:
+            self._cek = sekarang
+            path = path_aktif(self.db_file)
+            if self._engine is None or (path is not None and path != self._engine.db_path):
+                if self._engine is not None:
+                    self._lama.append((sekarang, self._engine))
+                self._engine = RadarEngine(self.db_file, weather=self.weather, kota=self.kota,
+                                           cache_size=self.cache_size, cache_ttl=self.cache_ttl)
+            # Engine versi lama yang sudah lewat masa tenggang ditutup
+            for waktu, eng in [x for x in self._lama if sekarang - x[0] >= self.tenggang]:
+                eng.close()
+            self._lama = [x for x in self._lama if sekarang - x[0] < self.tenggang]
+            return self._engine
+
+    def tabel_basi(self):
+        return self.get().tabel_basi(self.interval)
+
+    def sinkron(self, lapor=print, paksa=False):
+        # Build blocking (DB belum ada / tabel belum lengkap), request berikutnya langsung pakai versi baru
+        basi = sinkron_db(self.db_file, lapor=lapor, paksa=paksa, sumber=self.kota.sumber, kota=self.kota)
+        self.segarkan()
+        return basi
+
+    def rebuild_background(self, lapor=print):
+        """Mulai build versi baru di thread background. False kalau build lain masih jalan / baru saja gagal."""
+        with self._lock:
+            if self._rebuild is not None and self._rebuild.is_alive():
+                return False
+            if self.status_rebuild and self.status_rebuild[1] == 'gagal' and time.monotonic() - self.status_rebuild[0] < self.jeda_gagal:
+                return False
+            self._rebuild = threading.Thread(target=self._jalankan_rebuild, args=(lapor,), name='db-rebuild', daemon=True)
+            self._rebuild.start()
+        return True
+
+    def _jalankan_rebuild(self, lapor):
+        try:
+            basi = sinkron_db(self.db_file, lapor=lapor, sumber=self.kota.sumber, kota=self.kota)
+            self.status_rebuild = (time.monotonic(), 'ok', basi)
+            lapor(f"✅ DB versi baru aktif (diperbarui: {', '.join(basi) or '-'})")
+        except Exception as e:
+            self.status_rebuild = (time.monotonic(), 'gagal', str(e))
+            lapor(f"❌ Build DB versi baru gagal: {e}")
+        self.segarkan()
+
+    def close(self):
+        with self._lock:
+            for _, eng in self._lama:
+                eng.close()
+            self._lama = []
+            if self._engine is not None:
+                self._engine.close()
+                self._engine = None
+        if self.weather is not None:
+            self.weather.stop()
+
+
+class ShardKota:
+    """EngineAktif per kota, dibuat saat kota tsb pertama kali diminta.
+
+    Kota yang tidak pernah diminta tidak membuka DB, index, maupun provider cuaca, jadi menambah
+    kota di kota.json tidak menambah memori / latency kota lain. Argumen = argumen EngineAktif.
+    """
+
+    def __init__(self, **opsi):
+        self.opsi = opsi
+        self._lock = threading.Lock()
+        self._kota = {}
+
+    def daftar(self):
+        return list(DAFTAR_KOTA.values())
+
+    def get(self, kode=None):
+        kota = get_kota(kode)
+        aktif = self._kota.get(kota.kode)
+        if aktif is None:
+            with self._lock:
+                aktif = self._kota.get(kota.kode)
+                if aktif is None:
+                    aktif = EngineAktif(kota=kota, **self.opsi)
+                    self._kota[kota.kode] = aktif
+        return aktif
+
+    def terbuka(self):
+        return list(self._kota)
+
+    def close(self):
+        with self._lock:
+            for aktif in self._kota.values():
+                aktif.close()
+            self._kota = {}
+
+
+# ==========================================
+# 4. CLI BATCH
+# ==========================================
+KOLOM_OUTPUT = ['id', 'ciri', 'waktu', 'Fase', 'Profil', 'Skor', 'Lokasi_Nama', 'Lokasi_Full', 'lat', 'lon']
+
+def _parse_waktu(series, tz):
+    # Kolom 'waktu' opsional; waktu tanpa timezone dianggap waktu lokal kota
+    out = []
+    for v in series:
+        if pd.isna(v) or str(v).strip() == '':
+            out.append(None)
+            continue
+        ts = pd.Timestamp(v)
+        out.append((ts.tz_localize(tz) if ts.tzinfo is None else ts.tz_convert(tz)).to_pydatetime())
+    return out
+
+def _skema_output(id_teks):
+    # Skema Parquet tetap untuk semua chunk: kalau diambil dari chunk pertama, kolom yang kebetulan kosong
+    # semua di chunk itu bertipe null dan chunk berikutnya gagal di-cast
+    import pyarrow as pa
+    tipe = {'id': pa.string() if id_teks else pa.int64(), 'Skor': pa.int64(), 'lat': pa.float64(), 'lon': pa.float64()}
+    return pa.schema([(k, tipe.get(k, pa.string())) for k in KOLOM_OUTPUT])
+
+def _chunk_ke_frame(df_in, hasil, offset):
+    df_out = pd.DataFrame(hasil).reindex(columns=KOLOM_OUTPUT[3:])
+    df_out.insert(0, 'id', df_in['id'].to_numpy() if 'id' in df_in.columns else np.arange(offset, offset + len(df_in)))
+    df_out.insert(1, 'ciri', df_in['ciri'].to_numpy())
+    df_out.insert(2, 'waktu', df_in['waktu'].astype(str).to_numpy() if 'waktu' in df_in.columns else None)
+    df_out['Skor'] = df_out['Skor'].astype('Int64')
+    return df_out.astype({'Lokasi_Nama': object, 'Lokasi_Full': object, 'Profil': object, 'Fase': object})
+
+def run_batch(input_csv, output, chunksize=10_000, seed=None, sep='|', db_file=None, kota=None):
+    """Skor CSV berisi kolom `ciri` (trait dipisah '|') + opsional `waktu`/`id`, hasil di-stream ke CSV/Parquet."""
+    engine = RadarEngine(db_file, kota=kota)
+    rng = random.Random(seed) if seed is not None else random
+    as_parquet = output.endswith('.parquet')
+    writer = None
+    total = 0
+    # id dari input dibaca sebagai teks supaya tipenya sama di semua chunk
+    ada_id = 'id' in pd.read_csv(input_csv, nrows=0).columns
+    mulai = time.perf_counter()
+    try:
+        for df_in in pd.read_csv(input_csv, chunksize=chunksize, dtype={'ciri': str, 'id': str}):
+            daftar_ciri = [[x for x in str(c).split(sep) if x.strip()] if not pd.isna(c) else [] for c in df_in['ciri']]
+            waktu = _parse_waktu(df_in['waktu'], engine.tz) if 'waktu' in df_in.columns else None
+            hasil = engine.cari_target_batch(daftar_ciri, waktu, rng=rng)
+            df_out = _chunk_ke_frame(df_in, hasil, total)
+
+            if as_parquet:
+                import pyarrow as pa
+                import pyarrow.parquet as pq
+                if writer is None:
+                    writer = pq.ParquetWriter(output, _skema_output(ada_id))
+                writer.write_table(pa.Table.from_pandas(df_out, schema=writer.schema, preserve_index=False))
+            else:
+                df_out.to_csv(output, mode='w' if total == 0 else 'a', header=(total == 0), index=False)
+            total += len(df_in)
+    finally:
+        if writer is not None:
+            writer.close()
+        engine.close()
+
+    durasi = time.perf_counter() - mulai
+    rps = total / durasi if durasi > 0 else 0.0
+    print(f"🏁 {total} request diproses dalam {durasi:.2f} s ({rps:,.0f} req/s) -> {output}")
+    return {'total': total, 'detik': durasi, 'req_per_s': rps}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Batch rekomendasi Social Radar (headless)")
+    parser.add_argument('input', help="CSV dengan kolom 'ciri' (trait dipisah '|'), opsional 'waktu' dan 'id'")
+    parser.add_argument('-o', '--output', required=True, help="file hasil .csv atau .parquet")
+    parser.add_argument('--chunksize', type=int, default=10_000)
+    parser.add_argument('--seed', type=int, default=None, help="seed random supaya hasil bisa diulang")
+    parser.add_argument('--kota', default=KOTA_DEFAULT.kode, choices=list(DAFTAR_KOTA))
+    parser.add_argument('--db', default=None, help="default: DB kota yang dipilih")
+    args = parser.parse_args()
+    run_batch(args.input, args.output, chunksize=args.chunksize, seed=args.seed, db_file=args.db, kota=args.kota)
@@ -0,0 +1,131 @@
+import math
+import heapq
+import random
+
+# ==========================================
+# SPATIAL INDEX (GRID) UNTUK dim_gps
+# ==========================================
+# Koordinat diproyeksikan equirectangular ke meter (cukup akurat untuk skala kota/provinsi),
+# lalu dibagi ke sel grid berukuran tetap. Tiap kategori punya bucket sendiri,
+# jadi query "k tempat terdekat dengan kategori X" hanya menyentuh sel di sekitar titik.
+
+METER_PER_DERAJAT = 111320.0
+
+
+class GridIndex:
+    def __init__(self, df_gps, cell_m=500):
+        self.cell_m = float(cell_m)
+        self.nama = df_gps['nama_tempat'].tolist()
+        self.lat = df_gps['lat'].astype(float).tolist()
+        self.lon = df_gps['lon'].astype(float).tolist()
+        self.kategori = df_gps['kategori'].tolist()
+
+        # Faktor skala bujur diambil dari lintang rata-rata data
+        lat0 = sum(self.lat) / len(self.lat) if self.lat else 0.0
+        self.kx = METER_PER_DERAJAT * math.cos(math.radians(lat0))
+        self.ky = METER_PER_DERAJAT
+
+        self.x = [lo * self.kx for lo in self.lon]
+        self.y = [la * self.ky for la in self.lat]
+
+        # kategori -> {(cx, cy): [idx, ...]}  dan  kategori -> [idx, ...] (untuk pick acak O(1))
+        self.buckets = {}
+        self.per_kategori = {}
+        for i, kat in enumerate(self.kategori):
+            sel = self._sel(self.x[i], self.y[i])
+            self.buckets.setdefault(kat, {}).setdefault(sel, []).append(i)
+            self.per_kategori.setdefault(kat, []).append(i)
+
+        if self.x:
+            sel_semua = [self._sel(x, y) for x, y in zip(self.x, self.y)]
+            cx = [c[0] for c in sel_semua]
+            cy = [c[1] for c in sel_semua]
+            self.batas = (min(cx), max(cx), min(cy), max(cy))
+        else:
+            self.batas = (0, 0, 0, 0)
+
+    def __len__(self):
+        return len(self.nama)
+
+    def _sel(self, x, y):
+        return (int(math.floor(x / self.cell_m)), int(math.floor(y / self.cell_m)))
+
+    def _baris(self, i, jarak=None):
+        row = {'nama_tempat': self.nama[i], 'lat': self.lat[i], 'lon': self.lon[i], 'kategori': self.kategori[i]}
+        if jarak is not None:
+            row['jarak_m'] = jarak
+        return row
+
+    def _kategori_valid(self, kategori):
+        if kategori is None:
+            return list(self.buckets)
+        # Buang duplikat tapi jaga urutan
+        return [k for k in dict.fromkeys(kategori) if k in self.buckets]
+
+    def nearest(self, lat, lon, k=1, kategori=None, max_radius_m=None):
+        """k tempat terdekat dari (lat, lon), opsional dibatasi kategori. Hasil: list dict urut jarak."""
+        kats = self._kategori_valid(kategori)
+        if not kats or k <= 0:
+            return []
+
+        qx, qy = lon * self.kx, lat * self.ky
+        cx0, cy0 = self._sel(qx, qy)
+        min_cx, max_cx, min_cy, max_cy = self.batas
+        # Ring terjauh yang masih mungkin berisi data
+        r_max = max(abs(cx0 - min_cx), abs(cx0 - max_cx), abs(cy0 - min_cy), abs(cy0 - max_cy))
+        if max_radius_m is not None:
+            r_max = min(r_max, int(max_radius_m // self.cell_m) + 1)
+
+        best = []  # max-heap (pakai -jarak), isi maksimal k
+
+        def tawar(i):
+            d = math.hypot(self.x[i] - qx, self.y[i] - qy)
+            if max_radius_m is not None and d > max_radius_m:
+                return
+            if len(best) < k:
+                heapq.heappush(best, (-d, i))
+            elif d < -best[0][0]:
+                heapq.heapreplace(best, (-d, i))
+
+        # Kalau sel yang harus dikunjungi lebih banyak dari titiknya (kategori jarang / titik jauh
+        # di luar data), scan langsung semua anggota kategori lebih murah.
+        n_titik = sum(len(self.per_kategori[kat]) for kat in kats)
+        sel_dikunjungi = 0
+        for r in range(r_max + 1):
+            sel_dikunjungi += max(1, 8 * r)
+            if sel_dikunjungi > n_titik:
+                best = []
+                for kat in kats:
+                    for i in self.per_kategori[kat]:
+                        tawar(i)
+                break
+            for sel in self._ring(cx0, cy0, r):
+                for kat in kats:
+                    for i in self.buckets[kat].get(sel, ()):
+                        tawar(i)
+            # Semua sel yang belum dikunjungi berjarak >= r * cell_m
+            if len(best) >= k and -best[0][0] <= r * self.cell_m:
+                break
+
+        return [self._baris(i, -nd) for nd, i in sorted(best, key=lambda t: (-t[0], t[1]))]
+
+    def _ring(self, cx0, cy0, r):
+        if r == 0:
+            yield (cx0, cy0)
+            return
+        for dx in range(-r, r + 1):
+            yield (cx0 + dx, cy0 - r)
+            yield (cx0 + dx, cy0 + r)
+        for dy in range(-r + 1, r):
+            yield (cx0 - r, cy0 + dy)
+            yield (cx0 + r, cy0 + dy)
+
+    def pilih_acak(self, kategori=None, rng=random):
+        """Satu tempat acak (uniform atas gabungan kategori) tanpa sorting seluruh tabel."""
+        kats = self._kategori_valid(kategori)
+        if not kats:
+            return None
+        ukuran = [len(self.per_kategori[k]) for k in kats]
+        kat = rng.choices(kats, weights=ukuran)[0]
+        anggota = self.per_kategori[kat]
+        return self._baris(anggota[rng.randrange(len(anggota))])
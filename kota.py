@@ -0,0 +1,120 @@
+import os
+import json
+from contextlib import contextmanager, nullcontext
+
+# ==========================================
+# REGISTRY KOTA (SHARD PER KOTA)
+# ==========================================
+# Tiap kota punya data lake & DuckDB sendiri, jadi menambah kota tidak memperbesar tabel
+# (dan latency scan) kota lain:
+#   datalake/kota=<kode>/{bronze,silver,gold}/...   layout di dalamnya sama untuk semua kota
+#   social_radar_olap_<kode>.duckdb                 + versi blue/green-nya di db/
+# Daftar kota, file mentah (survey, rules, OSM), timezone & titik pusat ada di kota.json;
+# kota pertama di file = kota default. Path file mentah relatif ke folder repo.
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+KOTA_JSON = os.path.join(BASE_DIR, 'kota.json')
+
+
+class Kota:
+    def __init__(self, kode, nama, timezone, pusat, survey, rules, osm, base_dir=BASE_DIR):
+        self.kode = kode
+        self.nama = nama
+        self.timezone = timezone
+        # Titik fallback kalau lokasi tidak ketemu di OSM
+        self.pusat = tuple(pusat)
+        self.raw = {
+            'survey': os.path.join(base_dir, survey),
+            'rules': os.path.join(base_dir, rules),
+            'osm': os.path.join(base_dir, osm),
+        }
+
+        self.lake = os.path.join(base_dir, 'datalake', f'kota={kode}')
+        self.bronze = os.path.join(self.lake, 'bronze')
+        self.silver = os.path.join(self.lake, 'silver')
+        self.gold = os.path.join(self.lake, 'gold')
+        self.manifest = os.path.join(self.bronze, '_manifest.json')
+        self.rules_silver = os.path.join(self.silver, 'rules_data.parquet')
+        self.osm_silver = os.path.join(self.silver, 'osm_places.parquet')
+        self.gold_locations = os.path.join(self.gold, 'locations')
+        self.habitat_gps = os.path.join(self.gold, 'habitat_gps.parquet')
+        self.habitat_mart = os.path.join(self.gold, 'habitat_mart.parquet')
+        self.db_file = os.path.join(base_dir, f'social_radar_olap_{kode}.duckdb')
+        # Dipegang ELT selama run (eksklusif) & build DB (bersama), lihat kunci_lake
+        self.lock_lake = os.path.join(self.lake, '.elt.lock')
+
+        # Tabel dasar DuckDB -> sumbernya di data lake (urutan = urutan build)
+        self.sumber = {
+            'tb_survey': self.gold_locations,
+            'tb_rules': self.rules_silver,
+            'dim_gps': self.osm_silver,
+            'habitat_gps': self.habitat_gps,
+            'habitat_mart': self.habitat_mart,
+        }
+
+    def bronze_path(self, jenis):
+        # File mentah disalin ke bronze dengan nama aslinya
+        return os.path.join(self.bronze, os.path.basename(self.raw[jenis]))
+
+    def kunci_lake(self, bersama=False, lapor=None):
+        """Lock data lake kota ini: ELT eksklusif, build DB bersama (boleh beberapa sekaligus).
+
+        Selama ELT jalan file gold/silver sedang ditulis ulang (full refresh bahkan menghapus folder gold),
+        jadi build DB menunggu sampai ELT selesai. Data lake yang belum ada tidak perlu dikunci.
+        """
+        if bersama and not os.path.isdir(self.lake):
+            return nullcontext()
+        os.makedirs(self.lake, exist_ok=True)
+        pesan = f"⏳ ELT {self.nama} sedang berjalan, build DB menunggu sampai selesai..." if bersama else \
+                f"⏳ Data lake {self.nama} sedang dibaca build DB, ELT menunggu..."
+        return kunci_file(self.lock_lake, bersama, lapor, pesan)
+
+    def __repr__(self):
+        return f"Kota({self.kode!r}, {self.nama!r})"
+
+
+@contextmanager
+def kunci_file(path, bersama=False, lapor=None, pesan=None):
+    # flock antar proses (dan antar thread yang membuka file lock sendiri-sendiri). Kalau harus
+    # menunggu, `pesan` dilaporkan sekali dulu. Di OS tanpa fcntl (Windows) tidak ada penguncian.
+    try:
+        import fcntl
+    except ImportError:
+        yield
+        return
+    mode = fcntl.LOCK_SH if bersama else fcntl.LOCK_EX
+    with open(path, 'a') as f:
+        try:
+            fcntl.flock(f, mode | fcntl.LOCK_NB)
+        except BlockingIOError:
+            if lapor and pesan:
+                lapor(pesan)
+            fcntl.flock(f, mode)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def muat_kota(path=KOTA_JSON, base_dir=BASE_DIR):
+    """{kode: Kota} sesuai urutan di kota.json."""
+    with open(path, encoding='utf-8') as f:
+        isi = json.load(f)
+    if not isi:
+        raise ValueError(f"{path} tidak berisi kota")
+    return {kode: Kota(kode, base_dir=base_dir, **cfg) for kode, cfg in isi.items()}
+
+
+DAFTAR_KOTA = muat_kota()
+KOTA_DEFAULT = next(iter(DAFTAR_KOTA.values()))
+
+
+def get_kota(kode=None):
+    if kode is None:
+        return KOTA_DEFAULT
+    if isinstance(kode, Kota):
+        return kode
+    try:
+        return DAFTAR_KOTA[kode]
+    except KeyError:
+        raise KeyError(f"Kota '{kode}' tidak ada di {KOTA_JSON} (tersedia: {', '.join(DAFTAR_KOTA)})") from None
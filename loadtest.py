@@ -0,0 +1,501 @@
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import argparse
+import platform
+import tempfile
+import threading
+from collections import Counter
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import duckdb
+import numpy as np
+
+from benchmark import _baca_hasil, _commit, _jalankan_proses, _kirim_hasil, _rss_mb
+
+# ==========================================
+# LOAD TEST DASHBOARD (SESI STREAMLIT KONKUREN)
+# ==========================================
+# Tiap sesi browser menjalankan ulang app.py dari atas di thread-nya sendiri, tapi semua sesi di satu
+# proses server berbagi st.cache_resource: ShardKota -> EngineAktif (pool cursor DuckDB, cache hasil scan,
+# provider cuaca) beserta swap versi DB-nya. Script ini mensimulasikan satu proses server:
+#   1. N sesi = N thread yang memanggil engine persis seperti satu rerun app.py (Sesi.rerun) lewat satu
+#      ShardKota bersama. Server dipanaskan dulu, lalu semua sesi mulai bareng: buka halaman, pilih ciri
+#      acak, klik SCAN, berulang kali. Yang diukur rebutan di dalam satu server (cursor pool, cache, GIL);
+#      render UI Streamlit sendiri tidak ikut diukur. Dengan --ganti-versi, versi DB baru dibangun berkala
+#      selama pengukuran, jadi swap engine & penutupan engine lama setelah --tenggang detik ikut diuji;
+#   2. API cuaca diganti stub HTTP lokal (bisa diberi jeda / gagal), jadi tidak ada panggilan ke OWM;
+#   3. tiap nilai N diukur di proses terpisah di workdir sementara (cache & koneksi mulai bersih,
+#      datalake & DB milik repo tidak tersentuh);
+#   4. hasil per N (throughput, latency p50/p95/p99, scan selesai vs diharapkan, error per tipe exception
+#      DuckDB) ditulis sebagai JSON lines; --gerbang membandingkan dua file dan keluar
+#      dengan kode 1 kalau ada regresi atau hasil tidak lengkap.
+#
+# Contoh:
+#   python loadtest.py --sesi 1 4 16 --scan 20
+#   python loadtest.py --sesi 8 --survey 100000 --tanpa-cache --jeda-cuaca 200
+#   python loadtest.py --sesi 16 --scan 50 --ganti-versi 2 --tenggang 1
+#   python loadtest.py --gerbang loadtest_lama.jsonl loadtest_results.jsonl --toleransi 0.25
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+HASIL_DEFAULT = os.path.join(BASE_DIR, 'loadtest_results.jsonl')
+OPSI_FALLBACK = ["Kacamata", "Jas", "Tas Ransel"]  # dropdown app.py kalau opsi_traits gagal
+
+
+# ==========================================
+# 1. STUB API CUACA
+# ==========================================
+class StubCuaca:
+    """HTTP server lokal berformat respon OpenWeatherMap; menghitung jumlah panggilan."""
+
+    def __init__(self, jeda_ms=0, gagal=0.0, seed=0):
+        self.jeda_ms = jeda_ms
+        self.gagal = gagal
+        self.panggilan = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                with stub._lock:
+                    stub.panggilan += 1
+                    error = stub._rng.random() < stub.gagal
+                if stub.jeda_ms:
+                    time.sleep(stub.jeda_ms / 1000)
+                if error:
+                    self.send_error(500)
+                    return
+                body = json.dumps({'weather': [{'main': 'Clouds', 'description': 'awan mendung'}],
+                                   'main': {'temp': 29.5}}).encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self._server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self._server.server_address[1]}/data/2.5/weather"
+
+    def start(self):
+        threading.Thread(target=self._server.serve_forever, name='stub-cuaca', daemon=True).start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+# ==========================================
+# 2. SESI (THREAD DI SATU PROSES SERVER)
+# ==========================================
+def _fd_duckdb():
+    # Jumlah file .duckdb yang sedang dibuka proses ini (Linux; None kalau /proc tidak ada)
+    try:
+        fds = os.listdir('/proc/self/fd')
+    except OSError:
+        return None
+    n = 0
+    for fd in fds:
+        try:
+            n += os.readlink(os.path.join('/proc/self/fd', fd)).endswith('.duckdb')
+        except OSError:
+            pass
+    return n
+
+def kelas_error(e):
+    # Yang dicari: koneksi/cursor DuckDB yang sudah ditutup (mis. engine versi lama ditutup di tengah scan)
+    # dan error IO file DB (lock, versi yang sudah dihapus GC)
+    if isinstance(e, duckdb.ConnectionException):
+        return 'duckdb_koneksi'
+    if isinstance(e, duckdb.IOException):
+        return 'duckdb_io'
+    if isinstance(e, duckdb.Error):
+        return 'duckdb_lain'
+    return 'lain'
+
+def _persen(nilai):
+    if not nilai:
+        return {'n': 0}
+    a = np.array(nilai)
+    return {'n': len(a), 'p50_ms': float(np.percentile(a, 50)), 'p95_ms': float(np.percentile(a, 95)),
+            'p99_ms': float(np.percentile(a, 99)), 'mean_ms': float(a.mean()), 'max_ms': float(a.max())}
+
+
+class Sesi:
+    """Satu pengguna dashboard: buka halaman, lalu pilih ciri acak + klik SCAN sebanyak `n_scan` kali.
+
+    Semua sesi memakai `shard` yang sama, seperti st.cache_resource di satu proses server.
+    """
+
+    def __init__(self, shard, kode, idx, n_scan, seed=0, jeda=0.0):
+        self.shard = shard
+        self.kode = kode
+        self.n_scan = n_scan
+        self.jeda = jeda
+        self.rng = random.Random(seed * 1_000_003 + idx)
+        self.latency = {'muat': [], 'pilih': [], 'scan': []}
+        self.error = Counter()
+        self.contoh_error = []
+        self.kosong = 0
+        self.fallback = 0
+        self.gagal = None
+
+    def rerun(self, ciri=(), scan=False):
+        # Panggilan engine satu rerun app.py, urutannya sama (cek DB, sidebar, cuaca & waktu, scan).
+        # Tiap panggilan mengambil engine aktif lagi, seperti get_engine() di app.py
+        radar = self.shard.get(self.kode)
+        if not radar.ada_db():
+            radar.sinkron(lapor=print, paksa=True)
+        elif radar.get().tabel_belum_ada():
+            radar.sinkron(lapor=print)
+        elif radar.tabel_basi():
+            radar.rebuild_background(lapor=print)
+        try:
+            opsi = radar.get().opsi_traits()
+        except Exception:
+            opsi = OPSI_FALLBACK
+        radar.get().cache.stats()
+        radar.get().get_cuaca()
+        ctx = radar.get().get_time_context()
+        hasil = None
+        if scan and ciri:
+            hasil = radar.get().cari_target(list(ciri), context_waktu=ctx)
+        return list(opsi), hasil
+
+    def _jalankan(self, jenis, ciri=(), scan=False):
+        t0 = time.perf_counter()
+        try:
+            hasil = self.rerun(ciri, scan)
+        except Exception as e:
+            # Di Streamlit exception ini tampil sebagai traceback di halaman pengguna
+            self.error[kelas_error(e)] += 1
+            if len(self.contoh_error) < 3:
+                self.contoh_error.append(f"{type(e).__name__}: {e}"[:300])
+            return None
+        self.latency[jenis].append((time.perf_counter() - t0) * 1000)
+        return hasil
+
+    def _istirahat(self):
+        # Think time pengguna (0 = closed loop, tekanan maksimum)
+        if self.jeda:
+            time.sleep(self.rng.uniform(0, 2 * self.jeda))
+
+    def _muat(self):
+        hasil = self._jalankan('muat')
+        return None if hasil is None else hasil[0]
+
+    def _scan(self, opsi):
+        # Return opsi dropdown setelah scan (None = halaman error)
+        self._istirahat()
+        if opsi == OPSI_FALLBACK:
+            self.fallback += 1
+        ciri = self.rng.sample(opsi, self.rng.randint(1, min(4, len(opsi))))
+        # Ganti pilihan memicu rerun sendiri (tanpa scan), persis seperti di browser
+        if self._jalankan('pilih', ciri) is None:
+            return None
+        hasil = self._jalankan('scan', ciri, scan=True)
+        if hasil is None:
+            return None
+        self.kosong += hasil[1] is not None and hasil[1].empty
+        return hasil[0]
+
+    def jalankan(self, mulai=None):
+        try:
+            if mulai is not None:
+                mulai.wait()
+            opsi = self._muat()
+            for _ in range(self.n_scan):
+                if opsi is None:
+                    # Halaman error: pengguna menekan refresh dulu
+                    opsi = self._muat()
+                    if opsi is None:
+                        continue
+                opsi = self._scan(opsi)
+        except Exception as e:
+            # Bug di harness sendiri; scan sisanya hilang (terlihat di scan X/Y)
+            self.gagal = f"{type(e).__name__}: {e}"[:300]
+        return self
+
+
+def _buat_shard(args):
+    # Sama dengan get_shard() di app.py (satu per proses server); masa tenggang engine versi lama bisa diatur
+    from engine import ShardKota
+    return ShardKota(api_key=os.environ['API_KEY_CUACA'], weather_endpoint=os.environ['WEATHER_ENDPOINT'],
+                     weather_ttl=int(os.getenv("WEATHER_TTL", "600")),
+                     cache_size=int(os.getenv("RESULT_CACHE_SIZE", "1024")),
+                     cache_ttl=int(os.getenv("RESULT_CACHE_TTL", "600")), tenggang=args.tenggang)
+
+def _ganti_versi(kode, interval, berhenti, hasil):
+    # Versi DB baru dibangun tiap `interval` detik (seperti rebuild setelah ELT): sesi yang sedang scan
+    # harus pindah ke engine baru tanpa error, engine lama ditutup setelah masa tenggang
+    import engine
+    while not berhenti.wait(interval):
+        try:
+            engine.sinkron_kota(kode, lapor=lambda pesan: None, paksa=True)
+            hasil['versi_baru'] += 1
+        except Exception as e:
+            hasil['error'].append(f"{type(e).__name__}: {e}"[:300])
+
+def _ukur_sesi(args):
+    import engine
+    from metrics import METRICS
+
+    # DB dibangun sebelum pengukuran (bukan bagian dari beban per sesi)
+    kode = args.kota or engine.KOTA_DEFAULT.kode
+    mulai = time.perf_counter()
+    engine.sinkron_kota(kode)
+    detik_init = time.perf_counter() - mulai
+
+    shard = _buat_shard(args)
+    try:
+        # Pemanasan: satu halaman dibuka dulu (engine, index, provider cuaca terisi), seperti server yang sudah jalan
+        mulai = time.perf_counter()
+        pemanasan = Sesi(shard, kode, -1, 0, seed=args.seed).jalankan()
+        detik_pemanasan = time.perf_counter() - mulai
+        METRICS.counter.clear()
+
+        n = args.ukur_sesi
+        mulai_bareng = threading.Barrier(n + 1)
+        semua = [Sesi(shard, kode, i, args.scan, seed=args.seed, jeda=args.jeda) for i in range(n)]
+        threads = [threading.Thread(target=s.jalankan, args=(mulai_bareng,), name=f'sesi-{i}', daemon=True)
+                   for i, s in enumerate(semua)]
+        for t in threads:
+            t.start()
+        ganti = {'versi_baru': 0, 'error': []}
+        berhenti = threading.Event()
+        if args.ganti_versi:
+            threading.Thread(target=_ganti_versi, args=(kode, args.ganti_versi, berhenti, ganti),
+                             name='ganti-versi', daemon=True).start()
+        mulai_bareng.wait()
+        mulai = time.perf_counter()
+        for t in threads:
+            t.join()
+        detik = time.perf_counter() - mulai
+        berhenti.set()
+        fd_duckdb = _fd_duckdb()
+    finally:
+        shard.close()
+
+    latency = {k: sum((s.latency[k] for s in semua), []) for k in ('muat', 'pilih', 'scan')}
+    error = sum((s.error for s in semua), Counter())
+    gagal = [s.gagal for s in semua if s.gagal]
+    counter = METRICS.counter
+    n_rerun = sum(len(v) for v in latency.values())
+    return {
+        'detik': detik, 'init_db_s': detik_init, 'pemanasan_s': detik_pemanasan,
+        'pemanasan_error': dict(pemanasan.error),
+        'sesi_gagal': len(gagal), 'scan_diharapkan': n * args.scan,
+        'scan': len(latency['scan']), 'rerun': n_rerun,
+        'scan_per_s': len(latency['scan']) / detik, 'rerun_per_s': n_rerun / detik,
+        'latency': {k: _persen(v) for k, v in latency.items()},
+        'error': dict(error), 'error_db': sum(v for k, v in error.items() if k.startswith('duckdb')),
+        'contoh_error': (sum((s.contoh_error for s in semua), []) + gagal + ganti['error'])[:5],
+        'hasil_kosong': sum(s.kosong for s in semua), 'opsi_fallback': sum(s.fallback for s in semua),
+        'cache_hit': counter.get('cari_target.cache_hit', 0), 'cache_miss': counter.get('cari_target.cache_miss', 0),
+        'cursor_baru': counter.get('duckdb.cursor_baru', 0), 'prepare': counter.get('duckdb.prepare', 0),
+        'versi_baru': ganti['versi_baru'], 'error_ganti_versi': len(ganti['error']),
+        'fd_duckdb': fd_duckdb, 'peak_rss_mb': _rss_mb(),
+    }
+
+def _jalankan_anak(args):
+    os.chdir(args.workdir)
+    sys.path.insert(0, args.workdir)
+    stub = StubCuaca(jeda_ms=args.jeda_cuaca, gagal=args.cuaca_gagal, seed=args.seed).start()
+    # Dibaca _buat_shard, sama dengan app.py
+    os.environ['API_KEY_CUACA'] = 'loadtest'
+    os.environ['WEATHER_ENDPOINT'] = stub.url
+    if args.tanpa_cache:
+        os.environ['RESULT_CACHE_SIZE'] = '0'
+    try:
+        hasil = _ukur_sesi(args)
+    finally:
+        stub.stop()
+    hasil['panggilan_cuaca'] = stub.panggilan
+    _kirim_hasil(hasil)
+
+
+# ==========================================
+# 3. ORKESTRASI
+# ==========================================
+def siapkan_workdir(workdir, survey=None, osm=None, chunksize=None, verbose=False):
+    # Salinan kode + data lake/DB repo; dengan --survey/--osm data sintetis benchmark.py
+    # di-ELT dulu di workdir (hanya kota default)
+    import benchmark
+    from kota import DAFTAR_KOTA
+    if survey is not None:
+        survey_path, osm_path = benchmark.data_sintetis(
+            os.path.join(tempfile.gettempdir(), 'social_radar_bench'), survey, osm, 0)
+        benchmark.siapkan_workdir(workdir, survey_path, osm_path)
+        e = benchmark.ukur('elt', workdir, chunksize=chunksize, verbose=verbose)
+        print(f"   ELT data sintetis: {e['gold_baris']:,} baris gold, {e['osm_tempat']:,} tempat dalam {e['detik']:.1f} s")
+        return
+
+    for nama in benchmark.KODE + ['archetype_keywords.csv']:
+        shutil.copy2(os.path.join(BASE_DIR, nama), workdir)
+    for k in DAFTAR_KOTA.values():
+        for path in list(k.raw.values()) + [k.db_file]:
+            if os.path.exists(path):
+                shutil.copy2(path, os.path.join(workdir, os.path.relpath(path, BASE_DIR)))
+        if os.path.isdir(k.lake):
+            shutil.copytree(k.lake, os.path.join(workdir, os.path.relpath(k.lake, BASE_DIR)))
+
+def ukur(n_sesi, workdir, scan, seed=0, kota=None, jeda=0.0, jeda_cuaca=0, cuaca_gagal=0.0,
+         tanpa_cache=False, ganti_versi=0.0, tenggang=60.0, verbose=False):
+    cmd = [sys.executable, os.path.abspath(__file__), '--ukur-sesi', str(n_sesi), '--workdir', workdir,
+           '--scan', str(scan), '--seed', str(seed), '--jeda', str(jeda), '--jeda-cuaca', str(jeda_cuaca),
+           '--cuaca-gagal', str(cuaca_gagal), '--ganti-versi', str(ganti_versi), '--tenggang', str(tenggang)]
+    if kota:
+        cmd += ['--kota', kota]
+    if tanpa_cache:
+        cmd.append('--tanpa-cache')
+    return _jalankan_proses(cmd, f"Load test {n_sesi} sesi", verbose)
+
+def run_loadtest(daftar_sesi, scan=10, seed=0, kota=None, jeda=0.0, jeda_cuaca=0, cuaca_gagal=0.0,
+                 tanpa_cache=False, survey=None, osm=1_000, chunksize=None, ganti_versi=0.0, tenggang=60.0,
+                 output=HASIL_DEFAULT, verbose=False):
+    commit = _commit()
+    mesin = {'python': platform.python_version(), 'platform': platform.platform(), 'cpu': os.cpu_count()}
+    semua = []
+    workdir = tempfile.mkdtemp(prefix='radar_loadtest_')
+    try:
+        siapkan_workdir(workdir, survey, osm, chunksize=chunksize, verbose=verbose)
+        for n_sesi in daftar_sesi:
+            print(f"⏱️ {n_sesi} sesi x {scan} scan ...")
+            hasil = {
+                'commit': commit, 'waktu': datetime.now().isoformat(timespec='seconds'), 'mesin': mesin,
+                'skenario': {'sesi': n_sesi, 'scan': scan, 'seed': seed, 'kota': kota, 'jeda': jeda,
+                             'jeda_cuaca': jeda_cuaca, 'cuaca_gagal': cuaca_gagal, 'tanpa_cache': tanpa_cache,
+                             'survey_baris': survey, 'osm_elemen': osm if survey is not None else None,
+                             'ganti_versi': ganti_versi, 'tenggang': tenggang},
+            }
+            hasil['hasil'] = ukur(n_sesi, workdir, scan, seed=seed, kota=kota, jeda=jeda, jeda_cuaca=jeda_cuaca,
+                                  cuaca_gagal=cuaca_gagal, tanpa_cache=tanpa_cache, ganti_versi=ganti_versi,
+                                  tenggang=tenggang, verbose=verbose)
+            r = hasil['hasil']
+            s, m = r['latency']['scan'], r['latency']['muat']
+            print(f"   throughput: {r['scan_per_s']:.1f} scan/s ({r['rerun_per_s']:.1f} rerun/s), "
+                  f"{r['scan']}/{r['scan_diharapkan']} scan selesai dalam {r['detik']:.2f} s")
+            if s['n']:
+                print(f"   scan      : p50 {s['p50_ms']:.0f} ms, p95 {s['p95_ms']:.0f} ms, p99 {s['p99_ms']:.0f} ms, max {s['max_ms']:.0f} ms")
+            if m['n']:
+                print(f"   muat awal : p50 {m['p50_ms']:.0f} ms, p95 {m['p95_ms']:.0f} ms")
+            print(f"   error     : {r['error'] or 0} (DuckDB: {r['error_db']}, sesi gagal: {r['sesi_gagal']})")
+            if ganti_versi:
+                print(f"   ganti DB  : {r['versi_baru']} versi baru selama pengukuran (gagal dibangun: {r['error_ganti_versi']}), "
+                      f"{r['fd_duckdb']} file .duckdb masih terbuka di akhir")
+            print(f"   lainnya   : cuaca stub dipanggil {r['panggilan_cuaca']}x, cache {r['cache_hit']} hit / {r['cache_miss']} miss, "
+                  f"{r['cursor_baru']} cursor / {r['prepare']} PREPARE baru, peak {r['peak_rss_mb']:.0f} MB")
+            for pesan in r['contoh_error']:
+                print(f"   ⚠️ {pesan}")
+            with open(output, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(hasil) + '\n')
+            semua.append(hasil)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    print(f"🏁 {len(semua)} level konkurensi tersimpan di: {output}")
+    return semua
+
+
+# ==========================================
+# 4. GERBANG REGRESI ANTAR COMMIT
+# ==========================================
+# (metrik, arah): +1 = makin besar makin baik, -1 = makin kecil makin baik
+METRIK = [(('scan_per_s',), 1), (('latency', 'scan', 'p50_ms'), -1), (('latency', 'scan', 'p95_ms'), -1),
+          (('latency', 'scan', 'p99_ms'), -1), (('latency', 'muat', 'p95_ms'), -1)]
+
+def masalah(r):
+    """Alasan hasil satu level tidak bisa dipercaya / gagal (kosong = bersih)."""
+    alasan = []
+    # Error DuckDB (koneksi tertutup, IO file DB) tidak ditoleransi sama sekali
+    if r.get('error_db'):
+        alasan.append(f"error_db {r['error_db']}")
+    # Scan yang hilang (rerun error, sesi mati) membuat throughput & latency tidak sebanding
+    if r.get('sesi_gagal'):
+        alasan.append(f"sesi_gagal {r['sesi_gagal']}")
+    if r.get('scan', 0) < r.get('scan_diharapkan', 0):
+        alasan.append(f"scan {r['scan']}/{r['scan_diharapkan']}")
+    return alasan
+
+def _kunci_skenario(s):
+    return json.dumps(s, sort_keys=True)
+
+def _ambil(d, kunci):
+    for k in kunci:
+        d = d.get(k, {}) if isinstance(d, dict) else {}
+    return d if isinstance(d, (int, float)) else None
+
+def gerbang(path_lama, path_baru, toleransi=0.2):
+    """Bandingkan dua file hasil; return daftar pelanggaran (kosong = lolos)."""
+    lama, baru = _baca_hasil(path_lama, _kunci_skenario), _baca_hasil(path_baru, _kunci_skenario)
+    pelanggaran = []
+    for key in sorted(set(lama) & set(baru), key=lambda k: json.loads(k)['sesi']):
+        a, b = lama[key]['hasil'], baru[key]['hasil']
+        s = json.loads(key)
+        print(f"📊 sesi={s['sesi']} scan={s['scan']} tanpa_cache={s['tanpa_cache']} survey={s['survey_baris']}  "
+              f"({lama[key]['commit']} -> {baru[key]['commit']})")
+        for kunci, arah in METRIK:
+            va, vb = _ambil(a, kunci), _ambil(b, kunci)
+            if va is None or vb is None:
+                continue
+            rasio = vb / va if va else float('nan')
+            buruk = rasio < 1 - toleransi if arah > 0 else rasio > 1 + toleransi
+            nama = '.'.join(kunci)
+            print(f"   {'❌' if buruk else '✅'} {nama:<22} {va:>10.2f} -> {vb:>10.2f}  (x{rasio:.2f})")
+            if buruk:
+                pelanggaran.append(f"sesi={s['sesi']} {nama} x{rasio:.2f}")
+        for alasan in masalah(b):
+            print(f"   ❌ {alasan}")
+            pelanggaran.append(f"sesi={s['sesi']} {alasan}")
+    if not set(lama) & set(baru):
+        print("⚠️ Tidak ada skenario yang sama di kedua file")
+    return pelanggaran
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load test sesi Streamlit konkuren untuk dashboard Social Radar")
+    parser.add_argument('--sesi', type=int, nargs='+', default=[1, 2, 4, 8], help="jumlah sesi bersamaan (satu level per nilai)")
+    parser.add_argument('--scan', type=int, default=10, help="jumlah klik SCAN per sesi")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--kota', default=None, help="kode kota yang dipilih tiap sesi (default: kota default)")
+    parser.add_argument('--jeda', type=float, default=0.0, help="rata-rata think time antar scan (detik)")
+    parser.add_argument('--jeda-cuaca', type=int, default=0, help="latency stub API cuaca (ms)")
+    parser.add_argument('--cuaca-gagal', type=float, default=0.0, help="fraksi respon stub cuaca yang HTTP 500")
+    parser.add_argument('--tanpa-cache', action='store_true', help="matikan cache hasil scan (RESULT_CACHE_SIZE=0)")
+    parser.add_argument('--survey', type=int, default=None, help="pakai survey sintetis N baris (default: data repo)")
+    parser.add_argument('--osm', type=int, default=1_000, help="jumlah elemen Overpass sintetis (dengan --survey)")
+    parser.add_argument('--chunksize', type=int, default=None, help="diteruskan ke run_elt untuk data sintetis")
+    parser.add_argument('--ganti-versi', type=float, default=0.0,
+                        help="bangun versi DB baru tiap N detik selama pengukuran (0 = tidak)")
+    parser.add_argument('--tenggang', type=float, default=60.0,
+                        help="detik sebelum engine versi DB lama ditutup (EngineAktif, default sama dengan app)")
+    parser.add_argument('-o', '--output', default=HASIL_DEFAULT, help="file JSON lines hasil (di-append)")
+    parser.add_argument('-v', '--verbose', action='store_true', help="tampilkan output proses anak")
+    parser.add_argument('--gerbang', nargs=2, metavar=('LAMA', 'BARU'), help="bandingkan dua file hasil, exit 1 kalau regresi")
+    parser.add_argument('--toleransi', type=float, default=0.2, help="regresi relatif yang masih diterima oleh --gerbang")
+    parser.add_argument('--ukur-sesi', type=int, help=argparse.SUPPRESS)
+    parser.add_argument('--workdir', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.ukur_sesi:
+        _jalankan_anak(args)
+    elif args.gerbang:
+        pelanggaran = gerbang(*args.gerbang, toleransi=args.toleransi)
+        print(f"{'❌' if pelanggaran else '✅'} Gerbang load test: {len(pelanggaran)} regresi")
+        sys.exit(1 if pelanggaran else 0)
+    else:
+        semua = run_loadtest(args.sesi, scan=args.scan, seed=args.seed, kota=args.kota, jeda=args.jeda,
+                             jeda_cuaca=args.jeda_cuaca, cuaca_gagal=args.cuaca_gagal, tanpa_cache=args.tanpa_cache,
+                             survey=args.survey, osm=args.osm, chunksize=args.chunksize,
+                             ganti_versi=args.ganti_versi, tenggang=args.tenggang,
+                             output=args.output, verbose=args.verbose)
+        # Error DuckDB atau scan yang hilang di run mana pun = gagal (bisa langsung dipakai sebagai gate CI)
+        sys.exit(1 if any(masalah(h['hasil']) for h in semua) else 0)
@@ -0,0 +1,213 @@
+import os
+import json
+import time
+import atexit
+import threading
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# ==========================================
+# INSTRUMENTASI (SPAN, COUNTER, SINK)
+# ==========================================
+# Tiap tahap dibungkus `with span('nama') as s:`; durasi, jumlah baris (s['rows']) dan byte
+# (s['bytes']) dikumpulkan di memori per nama span. Sink diatur lewat env RADAR_METRICS
+# (boleh lebih dari satu, pisah koma):
+#   jsonl:<path>   satu baris JSON per span selesai (append)
+#   prom:<path>    file teks format Prometheus (untuk textfile collector), ditulis ulang maks 1x/detik
+#   http:<port>    endpoint /metrics format Prometheus di thread background
+# Kejadian yang cuma perlu dihitung (mis. cache hit/miss) dicatat lewat `hitung('nama')`.
+# RADAR_PROFILE_DIR=<folder> menyimpan profil JSON DuckDB untuk query yang dibungkus `profil()`.
+
+PREFIX = 'radar'
+
+
+class Metrics:
+    def __init__(self, sinks='', profile_dir=None, interval_prom=1.0):
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.stats = {}  # nama span -> dict(count, detik, max, rows, bytes, error)
+        self.counter = {}  # nama kejadian -> jumlah
+        self.jsonl_path = None
+        self.prom_path = None
+        self.http_port = None
+        self.profile_dir = profile_dir
+        self.interval_prom = interval_prom
+        self._prom_terakhir = 0.0
+        self._server = None
+        # Worker process pool (fork) mewarisi objek ini; file prom hanya ditulis proses pembuatnya
+        self._pid = os.getpid()
+
+        for sink in filter(None, (s.strip() for s in sinks.split(','))):
+            jenis, _, tujuan = sink.partition(':')
+            if jenis == 'jsonl':
+                self.jsonl_path = tujuan
+            elif jenis == 'prom':
+                self.prom_path = tujuan
+            elif jenis == 'http':
+                self.http_port = int(tujuan)
+            else:
+                raise ValueError(f"Sink metrics tidak dikenal: {sink}")
+        if self.profile_dir:
+            os.makedirs(self.profile_dir, exist_ok=True)
+        if self.http_port is not None:
+            self.serve_http(self.http_port)
+        if self.prom_path:
+            atexit.register(self.tulis_prometheus)
+
+    @classmethod
+    def dari_env(cls):
+        return cls(os.getenv('RADAR_METRICS', ''), os.getenv('RADAR_PROFILE_DIR') or None)
+
+    # --- pencatatan ---
+    @contextmanager
+    def span(self, nama, **atribut):
+        """Ukur satu tahap. Isi s['rows'] / s['bytes'] di dalam blok untuk mencatat volume data."""
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        s = {'rows': None, 'bytes': None}
+        parent = stack[-1] if stack else None
+        stack.append(nama)
+        ok = True
+        mulai = time.perf_counter()
+        try:
+            yield s
+        except BaseException:
+            ok = False
+            raise
+        finally:
+            detik = time.perf_counter() - mulai
+            stack.pop()
+            self._catat(nama, detik, s['rows'], s['bytes'], ok, parent, atribut)
+
+    def _catat(self, nama, detik, rows, nbytes, ok, parent, atribut):
+        with self._lock:
+            st = self.stats.get(nama)
+            if st is None:
+                st = self.stats[nama] = {'count': 0, 'detik': 0.0, 'max': 0.0, 'rows': 0, 'bytes': 0, 'error': 0}
+            st['count'] += 1
+            st['detik'] += detik
+            st['max'] = max(st['max'], detik)
+            st['rows'] += rows or 0
+            st['bytes'] += nbytes or 0
+            st['error'] += 0 if ok else 1
+
+            if self.jsonl_path:
+                event = {'ts': time.time(), 'span': nama, 'detik': detik, 'ok': ok}
+                if parent: event['parent'] = parent
+                if rows is not None: event['rows'] = rows
+                if nbytes is not None: event['bytes'] = nbytes
+                event.update(atribut)
+                with open(self.jsonl_path, 'a', encoding='utf-8') as f:
+                    f.write(json.dumps(event, default=str) + '\n')
+
+        if self.prom_path and os.getpid() == self._pid and time.monotonic() - self._prom_terakhir >= self.interval_prom:
+            self.tulis_prometheus()
+
+    def hitung(self, nama, n=1):
+        with self._lock:
+            self.counter[nama] = self.counter.get(nama, 0) + n
+
+    # --- profil DuckDB ---
+    def aktifkan_profil(self, con, nama):
+        """Nyalakan profil JSON DuckDB di `con` untuk query berikutnya. False kalau RADAR_PROFILE_DIR tidak diset."""
+        if not self.profile_dir:
+            return False
+        path = os.path.join(self.profile_dir, f"{nama}-{time.time_ns()}.json")
+        con.execute("PRAGMA enable_profiling = 'json'")
+        con.execute(f"PRAGMA profiling_output = '{path}'")
+        return True
+
+    @contextmanager
+    def profil(self, con, nama):
+        """Profil query DDL di dalam blok (hasilnya tidak dibaca, jadi profiling boleh langsung dimatikan)."""
+        aktif = self.aktifkan_profil(con, nama)
+        try:
+            yield
+        finally:
+            if aktif:
+                con.execute("PRAGMA disable_profiling")
+
+    # --- ekspor ---
+    def snapshot(self):
+        with self._lock:
+            return {k: dict(v) for k, v in self.stats.items()}
+
+    def prometheus(self):
+        stats = sorted(self.snapshot().items())
+        baris = [f"# HELP {PREFIX}_span_seconds Durasi tiap tahap (detik)", f"# TYPE {PREFIX}_span_seconds summary"]
+        for k, v in stats:
+            baris.append(f'{PREFIX}_span_seconds_sum{{span="{k}"}} {v["detik"]!r}')
+            baris.append(f'{PREFIX}_span_seconds_count{{span="{k}"}} {v["count"]}')
+
+        def metrik(nama, jenis, bantuan, kunci):
+            baris.append(f"# HELP {PREFIX}_{nama} {bantuan}")
+            baris.append(f"# TYPE {PREFIX}_{nama} {jenis}")
+            for k, v in stats:
+                if jenis == 'gauge' or v[kunci]:
+                    baris.append(f'{PREFIX}_{nama}{{span="{k}"}} {v[kunci]!r}')
+        metrik('span_seconds_max', 'gauge', "Durasi span terlama (detik)", 'max')
+        metrik('span_errors_total', 'counter', "Span yang berakhir dengan exception", 'error')
+        metrik('rows_total', 'counter', "Baris yang diproses", 'rows')
+        metrik('bytes_total', 'counter', "Byte yang diproses", 'bytes')
+
+        with self._lock:
+            counter = sorted(self.counter.items())
+        if counter:
+            baris.append(f"# HELP {PREFIX}_events_total Jumlah kejadian (mis. cache hit/miss)")
+            baris.append(f"# TYPE {PREFIX}_events_total counter")
+            for k, v in counter:
+                baris.append(f'{PREFIX}_events_total{{event="{k}"}} {v}')
+        return '\n'.join(baris) + '\n'
+
+    def tulis_prometheus(self, path=None):
+        path = path or self.prom_path
+        if not path:
+            return
+        self._prom_terakhir = time.monotonic()
+        # Tulis atomik supaya scraper tidak pernah membaca file setengah jadi
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            f.write(self.prometheus())
+        os.replace(tmp, path)
+
+    def serve_http(self, port):
+        metrics = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.rstrip('/') != '/metrics':
+                    self.send_error(404)
+                    return
+                body = metrics.prometheus().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(('127.0.0.1', port), Handler)
+        threading.Thread(target=self._server.serve_forever, name='metrics-http', daemon=True).start()
+        return self._server
+
+    def ringkasan(self):
+        # Tabel singkat untuk dicetak di akhir ELT / benchmark
+        baris = []
+        for nama, v in sorted(self.snapshot().items(), key=lambda kv: -kv[1]['detik']):
+            extra = ''
+            if v['rows']: extra += f", {v['rows']:,} baris"
+            if v['bytes']: extra += f", {v['bytes'] / 1e6:,.1f} MB"
+            baris.append(f"   {nama:<28} {v['count']:>7}x {v['detik']:>9.3f} s{extra}")
+        with self._lock:
+            for nama, v in sorted(self.counter.items()):
+                baris.append(f"   {nama:<28} {v:>7}x")
+        return '\n'.join(baris)
+
+
+# Satu instance per proses (dipakai elt_pipeline, engine, db_pool)
+METRICS = Metrics.dari_env()
+span = METRICS.span
+profil = METRICS.profil
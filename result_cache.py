@@ -0,0 +1,57 @@
+import time
+import threading
+from collections import OrderedDict
+
+# ==========================================
+# CACHE HASIL (LRU + TTL)
+# ==========================================
+# Dipakai RadarEngine untuk hasil cari_target: scan dengan ciri & fase waktu yang sama tidak
+# dihitung ulang. Maksimal `maxsize` entri (yang paling lama tidak dipakai dibuang duluan),
+# tiap entri kedaluwarsa setelah `ttl` detik. Satu cache per engine = per versi DB, jadi
+# rebuild DB otomatis mulai dari cache kosong.
+
+
+class ResultCache:
+    def __init__(self, maxsize=1024, ttl=600):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hit = 0
+        self.miss = 0
+        self.evict = 0
+        self._data = OrderedDict()  # kunci -> (waktu simpan, nilai)
+        self._lock = threading.Lock()
+
+    def get(self, kunci):
+        """Return (ada, nilai). Entri yang kedaluwarsa dianggap tidak ada."""
+        with self._lock:
+            item = self._data.get(kunci)
+            if item is not None and time.monotonic() - item[0] < self.ttl:
+                self._data.move_to_end(kunci)
+                self.hit += 1
+                return True, item[1]
+            if item is not None:
+                del self._data[kunci]
+            self.miss += 1
+            return False, None
+
+    def put(self, kunci, nilai):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[kunci] = (time.monotonic(), nilai)
+            self._data.move_to_end(kunci)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evict += 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        with self._lock:
+            total = self.hit + self.miss
+            return {
+                'hit': self.hit, 'miss': self.miss, 'evict': self.evict, 'ukuran': len(self._data),
+                'hit_rate': self.hit / total if total else 0.0,
+            }
@@ -0,0 +1,90 @@
+import time
+import threading
+import requests
+
+# ==========================================
+# WEATHER PROVIDER (CACHE + BACKGROUND REFRESH)
+# ==========================================
+# Render Streamlit hanya membaca nilai di memori. Pengambilan ke OpenWeatherMap jalan di
+# thread background: tiap `ttl` detik, atau lebih cepat kalau ada pembaca yang melihat data
+# sudah basi (stale-while-revalidate). Kalau API gagal, data lama tetap dipakai sampai
+# `max_stale`, setelah itu baru jatuh ke nilai fallback "Offline".
+
+OWM_ENDPOINT = "http://api.openweathermap.org/data/2.5/weather"
+FALLBACK = ("Unknown", "Offline", 30)
+
+
+class WeatherProvider:
+    def __init__(self, kota, api_key, endpoint=OWM_ENDPOINT, ttl=600, timeout=3, max_stale=3600, retry=30):
+        self.kota = kota
+        self.api_key = api_key
+        # Endpoint bisa diganti (mis. stub HTTP server lokal untuk uji latency/gagal)
+        self.endpoint = endpoint
+        self.ttl = ttl
+        self.timeout = timeout
+        self.max_stale = max_stale
+        self.retry = retry
+
+        self.sukses = 0
+        self.gagal = 0
+        self._data = None
+        self._waktu_data = 0.0
+        self._percobaan_terakhir = 0.0
+        self._session = requests.Session()
+        self._lock = threading.Lock()
+        self._bangun = threading.Event()
+        self._berhenti = threading.Event()
+        self._thread = None
+
+    def start(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._berhenti.clear()
+                self._thread = threading.Thread(target=self._loop, name=f"weather-{self.kota}", daemon=True)
+                self._thread.start()
+        return self
+
+    def stop(self):
+        self._berhenti.set()
+        self._bangun.set()
+
+    def _loop(self):
+        while not self._berhenti.is_set():
+            ok = self.refresh()
+            # Sukses: tunggu sampai ttl (atau dibangunkan pembaca); gagal: coba lagi setelah `retry`
+            self._bangun.wait(self.ttl if ok else self.retry)
+            self._bangun.clear()
+
+    def refresh(self):
+        """Ambil cuaca terbaru secara sinkron (dipanggil dari thread background)."""
+        self._percobaan_terakhir = time.monotonic()
+        try:
+            params = {'q': self.kota, 'appid': self.api_key, 'units': 'metric', 'lang': 'id'}
+            d = self._session.get(self.endpoint, params=params, timeout=self.timeout).json()
+            data = (d['weather'][0]['main'], d['weather'][0]['description'], d['main']['temp'])
+        except Exception:
+            self.gagal += 1
+            return False
+        with self._lock:
+            self._data = data
+            self._waktu_data = time.monotonic()
+            self.sukses += 1
+        return True
+
+    def umur(self):
+        # Umur data di cache (detik), None kalau belum pernah berhasil ambil
+        with self._lock:
+            return None if self._data is None else time.monotonic() - self._waktu_data
+
+    def get(self):
+        """(main, description, temp) dari memori; tidak pernah menunggu jaringan."""
+        self.start()
+        with self._lock:
+            data, waktu = self._data, self._waktu_data
+        sekarang = time.monotonic()
+        basi = data is None or sekarang - waktu > self.ttl
+        if basi and sekarang - self._percobaan_terakhir > self.retry:
+            self._bangun.set()
+        if data is None or sekarang - waktu > self.max_stale:
+            return FALLBACK
+        return data